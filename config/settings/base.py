@@ -88,6 +88,7 @@ DJANGO_APPS = [
     "django.contrib.sites",
     "django.contrib.messages",
     "django.contrib.staticfiles",
+    "django.contrib.postgres",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
     "django.forms",
@@ -289,6 +290,21 @@ EMAIL_BACKEND = env(
 # https://docs.djangoproject.com/en/dev/ref/settings/#email-timeout
 EMAIL_TIMEOUT = 5
 
+# SMS
+# ------------------------------------------------------------------------------
+# Шлюз smspro.nikita.kg, см. namito.users.sms.
+SMS_GATEWAY_URL = env("SMS_GATEWAY_URL", default="https://smspro.nikita.kg/api/message")
+SMS_TIMEOUT = 5
+SMS_RETRIES = 3
+SMS_RETRY_BACKOFF = 0.5
+SMS_BATCH_SIZE = 50
+
+# ORDERS
+# ------------------------------------------------------------------------------
+# Через сколько секунд неоплаченный заказ с оплатой картой отменяется и
+# возвращает остатки, см. namito.orders.stock.release_expired_reservations.
+ORDER_RESERVATION_TIMEOUT = 24 * 60 * 60
+
 # ADMIN
 # ------------------------------------------------------------------------------
 # Django Admin URL.
@@ -491,6 +507,11 @@ SIMPLEUI_CONFIG = {
             'name': "Уведомление",
             'icon': 'fa fa-bell',
             'url': '/admin/advertisement/notification/'
+        },
+        {
+            'name': "Рассылки",
+            'icon': 'fa fa-paper-plane',
+            'url': '/admin/advertisement/broadcast/'
         }
     ]
 }
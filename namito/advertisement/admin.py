@@ -1,10 +1,7 @@
 from django.contrib import admin
-from django.contrib import messages
-from firebase_admin.exceptions import InvalidArgumentError
 
-from namito.advertisement.models import Advertisement, Notification
-from namito.advertisement.firebase import send_firebase_notification
-from namito.users.models import User
+from namito.advertisement.broadcast import start_broadcast
+from namito.advertisement.models import Advertisement, Broadcast, Notification
 
 
 class AdvertisementInline(admin.StackedInline):
@@ -19,24 +16,24 @@ class NotificationAdmin(admin.ModelAdmin):
     actions = ['send_notification']
 
     def send_notification(self, request, queryset):
-        users_with_tokens = User.objects.filter(
-            receive_notifications=True
-        ).exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
-
         for notification in queryset:
-            for user in users_with_tokens:
-                try:
-                    image_url = request.build_absolute_uri(notification.image.url) if notification.image else None
-                    send_firebase_notification(
-                        user.fcm_token,
-                        notification.title,
-                        notification.description,
-                        notification.date,
-                        image_url
-                    )
-                except InvalidArgumentError:
-                    messages.error(request, f"Ошибка при отправке уведомления пользователю с токеном: {user.fcm_token}")
-
-        self.message_user(request, "Notifications sent successfully")
+            image_url = request.build_absolute_uri(notification.image.url) if notification.image else None
+            start_broadcast(notification, image_url)
+
+        self.message_user(request, "Рассылка запущена, прогресс можно посмотреть в разделе «Рассылки»")
 
     send_notification.short_description = "Отправить выбранные уведомления"
+
+
+@admin.register(Broadcast)
+class BroadcastAdmin(admin.ModelAdmin):
+    list_display = ('notification', 'status', 'total', 'sent', 'failed', 'pruned', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('notification', 'image_url', 'status', 'total', 'sent', 'failed', 'pruned',
+                       'created_at', 'finished_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
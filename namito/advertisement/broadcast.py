@@ -0,0 +1,119 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from firebase_admin import messaging
+from firebase_admin.exceptions import FirebaseError, InvalidArgumentError
+
+from namito.advertisement.firebase import build_multicast_message
+from namito.advertisement.models import Broadcast
+from namito.users.models import User
+
+logger = logging.getLogger(__name__)
+
+# Больше токенов в одном multicast запросе FCM не принимает.
+CHUNK_SIZE = 500
+SEND_WORKERS = 4
+# Ошибки, после которых токен больше не годится для отправки. InvalidArgumentError
+# сюда не входит: FCM отвечает им и на битое сообщение (картинка, размер, ключи
+# data), и тогда из-за одной рассылки потеряли бы токены все пользователи.
+INVALID_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+
+# Рассылки идут по одной в фоновом потоке процесса, чтобы не держать запрос админки.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='broadcast')
+
+
+def get_recipients():
+    return User.objects.filter(
+        receive_notifications=True
+    ).exclude(fcm_token__isnull=True).exclude(fcm_token__exact='')
+
+
+def start_broadcast(notification, image_url=None):
+    """Создаёт рассылку уведомления и запускает её после коммита транзакции."""
+    broadcast = Broadcast.objects.create(notification=notification, image_url=image_url,
+                                         total=get_recipients().count())
+    transaction.on_commit(lambda: _executor.submit(_run_in_background, broadcast.pk))
+    return broadcast
+
+
+def _run_in_background(broadcast_id):
+    # Future задачи никто не проверяет: любая ошибка логируется здесь, а рассылка
+    # помечается как неудачная, чтобы не остаться в статусе «В очереди»/«Отправляется».
+    try:
+        run_broadcast(broadcast_id)
+    except Exception:
+        logger.exception('Broadcast %s failed', broadcast_id)
+        try:
+            Broadcast.objects.filter(pk=broadcast_id).update(status=3, finished_at=timezone.now())
+        except Exception:
+            logger.exception('Could not mark broadcast %s as failed', broadcast_id)
+    finally:
+        connection.close()
+
+
+def run_broadcast(broadcast_id, client=None):
+    """
+    Отправляет рассылку пачками по CHUNK_SIZE токенов в SEND_WORKERS потоков.
+    Токены читаются из базы потоком, прогресс и недействительные токены
+    записываются по мере ответов FCM.
+    """
+    client = client or messaging
+    broadcast = Broadcast.objects.select_related('notification').get(pk=broadcast_id)
+    Broadcast.objects.filter(pk=broadcast_id).update(status=1)
+    notification = broadcast.notification
+    payload = (notification.title, notification.description, notification.date, broadcast.image_url)
+    tokens = get_recipients().values_list('fcm_token', flat=True).iterator(chunk_size=CHUNK_SIZE)
+
+    status = 2
+    try:
+        with ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix='fcm') as pool:
+            pending = set()
+            while chunk := list(islice(tokens, CHUNK_SIZE)):
+                pending.add(pool.submit(send_chunk, client, chunk, *payload))
+                if len(pending) >= SEND_WORKERS * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    _record_progress(broadcast_id, done)
+            _record_progress(broadcast_id, wait(pending).done)
+    except Exception:
+        logger.exception('Broadcast %s failed', broadcast_id)
+        status = 3
+    Broadcast.objects.filter(pk=broadcast_id).update(status=status, finished_at=timezone.now())
+
+
+def send_chunk(client, fcm_tokens, title, description, date, image_url=None):
+    """Отправляет одну пачку. Возвращает (доставлено, ошибок, недействительные токены)."""
+    message = build_multicast_message(fcm_tokens, title, description, date, image_url)
+    try:
+        response = client.send_each_for_multicast(message)
+    except FirebaseError as error:
+        logger.error('Error sending multicast message: %s', error)
+        return 0, len(fcm_tokens), []
+    invalid_tokens = [
+        token for token, result in zip(fcm_tokens, response.responses)
+        if not result.success and isinstance(result.exception, INVALID_TOKEN_ERRORS)
+    ]
+    rejected = [result.exception for result in response.responses
+                if not result.success and isinstance(result.exception, InvalidArgumentError)]
+    if rejected:
+        logger.error('FCM rejected %s of %s messages as invalid: %s', len(rejected), len(fcm_tokens), rejected[0])
+    return response.success_count, response.failure_count, invalid_tokens
+
+
+def _record_progress(broadcast_id, futures):
+    sent = failed = 0
+    invalid_tokens = []
+    for future in futures:
+        chunk_sent, chunk_failed, chunk_invalid = future.result()
+        sent += chunk_sent
+        failed += chunk_failed
+        invalid_tokens += chunk_invalid
+    pruned = 0
+    if invalid_tokens:
+        pruned = User.objects.filter(fcm_token__in=invalid_tokens).update(fcm_token=None)
+    Broadcast.objects.filter(pk=broadcast_id).update(
+        sent=F('sent') + sent, failed=F('failed') + failed, pruned=F('pruned') + pruned
+    )
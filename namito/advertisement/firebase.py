@@ -1,7 +1,8 @@
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, exceptions, messaging
 from datetime import datetime
 import logging
+import time
 
 logger = logging.getLogger(__name__)
 
@@ -9,18 +10,45 @@ cred = credentials.Certificate('firebase_key.json')
 firebase_admin.initialize_app(cred)
 
 
-def send_firebase_notification(fcm_token, title, description, date, image_url=None):
-    message = messaging.Message(
-        token=fcm_token,
-        notification=messaging.Notification(
-            title=title,
-            body=description,
-            image=image_url,
-        ),
-        data={
-            'date': date.isoformat() if isinstance(date, datetime) else str(date)
-        }
+# Временные ошибки FCM, после которых отправку стоит повторить.
+RETRYABLE_ERRORS = (exceptions.UnavailableError, exceptions.InternalError, exceptions.DeadlineExceededError,
+                    exceptions.ResourceExhaustedError, exceptions.UnknownError)
+SEND_RETRIES = 3
+SEND_RETRY_BACKOFF = 0.5
+
+
+def send_message(message):
+    """Отправляет сообщение, повторяя временные ошибки с экспоненциальной задержкой."""
+    for attempt in range(SEND_RETRIES + 1):
+        try:
+            return messaging.send(message)
+        except RETRYABLE_ERRORS as e:
+            if attempt == SEND_RETRIES:
+                raise
+            logger.warning(f"Retrying message after error: {e}")
+            time.sleep(SEND_RETRY_BACKOFF * 2 ** attempt)
+
+
+def _notification_payload(title, description, date, image_url):
+    notification = messaging.Notification(
+        title=title,
+        body=description,
+        image=image_url,
     )
+    data = {
+        'date': date.isoformat() if isinstance(date, datetime) else str(date)
+    }
+    return notification, data
+
+
+def build_multicast_message(fcm_tokens, title, description, date, image_url=None):
+    notification, data = _notification_payload(title, description, date, image_url)
+    return messaging.MulticastMessage(tokens=fcm_tokens, notification=notification, data=data)
+
+
+def send_firebase_notification(fcm_token, title, description, date, image_url=None):
+    notification, data = _notification_payload(title, description, date, image_url)
+    message = messaging.Message(token=fcm_token, notification=notification, data=data)
     try:
         response = messaging.send(message)
         logger.info(f"Successfully sent message: {response}")
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('advertisement', '0008_alter_notification_date_alter_notification_image'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Broadcast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('image_url', models.URLField(blank=True, max_length=500, null=True, verbose_name='Ссылка на картинку')),
+                ('status', models.IntegerField(choices=[(0, 'В очереди'), (1, 'Отправляется'), (2, 'Завершена'), (3, 'Ошибка')], default=0, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Получателей')),
+                ('sent', models.PositiveIntegerField(default=0, verbose_name='Доставлено')),
+                ('failed', models.PositiveIntegerField(default=0, verbose_name='Ошибок')),
+                ('pruned', models.PositiveIntegerField(default=0, verbose_name='Удалено токенов')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Время создания')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Время окончания')),
+                ('notification', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='broadcasts', to='advertisement.notification', verbose_name='Уведомление')),
+            ],
+            options={
+                'verbose_name': 'Рассылка',
+                'verbose_name_plural': 'Рассылки',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
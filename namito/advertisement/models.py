@@ -29,3 +29,31 @@ class Notification(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class Broadcast(models.Model):
+    STATUSES = [
+        (0, _("В очереди")),
+        (1, _("Отправляется")),
+        (2, _("Завершена")),
+        (3, _("Ошибка")),
+    ]
+
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='broadcasts',
+                                     verbose_name=_('Уведомление'))
+    image_url = models.URLField(max_length=500, blank=True, null=True, verbose_name=_('Ссылка на картинку'))
+    status = models.IntegerField(choices=STATUSES, default=0, verbose_name=_('Статус'))
+    total = models.PositiveIntegerField(default=0, verbose_name=_('Получателей'))
+    sent = models.PositiveIntegerField(default=0, verbose_name=_('Доставлено'))
+    failed = models.PositiveIntegerField(default=0, verbose_name=_('Ошибок'))
+    pruned = models.PositiveIntegerField(default=0, verbose_name=_('Удалено токенов'))
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name=_('Время создания'))
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name=_('Время окончания'))
+
+    class Meta:
+        verbose_name = _('Рассылка')
+        verbose_name_plural = _('Рассылки')
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f'{self.notification} ({self.created_at:%d.%m.%Y %H:%M})'
@@ -0,0 +1,121 @@
+import time
+
+import pytest
+from firebase_admin import messaging
+from firebase_admin.exceptions import InvalidArgumentError
+
+from namito.advertisement import broadcast as engine
+from namito.advertisement.models import Broadcast
+from namito.advertisement.models import Notification
+from namito.users.models import User
+
+RECIPIENTS = 1203
+
+
+class FakeResponse:
+    def __init__(self, exception=None):
+        self.exception = exception
+        self.success = exception is None
+
+
+class FakeBatchResponse:
+    def __init__(self, responses):
+        self.responses = responses
+        self.success_count = sum(response.success for response in responses)
+        self.failure_count = len(responses) - self.success_count
+
+
+class FakeMessaging:
+    """Клиент FCM в памяти: токены, начинающиеся с "dead", считаются удалёнными."""
+
+    def __init__(self):
+        self.messages = []
+
+    def send_each_for_multicast(self, message):
+        self.messages.append(message)
+        return FakeBatchResponse([
+            FakeResponse(messaging.UnregisteredError("unregistered") if token.startswith("dead") else None)
+            for token in message.tokens
+        ])
+
+
+@pytest.fixture()
+def recipients(db):
+    User.objects.bulk_create(
+        User(phone_number=f"+996{i:09d}", receive_notifications=True,
+             fcm_token=f"dead-{i}" if i % 100 == 0 else f"token-{i}")
+        for i in range(RECIPIENTS)
+    )
+    User.objects.create(phone_number="+996999999999", receive_notifications=False, fcm_token="muted")
+
+
+@pytest.fixture()
+def notification(db):
+    return Notification.objects.create(title="Распродажа", description="Скидки до 50%")
+
+
+def test_broadcast_sends_in_chunks_and_prunes_invalid_tokens(recipients, notification):
+    client = FakeMessaging()
+    broadcast = Broadcast.objects.create(notification=notification, total=RECIPIENTS)
+
+    engine.run_broadcast(broadcast.pk, client)
+
+    assert sorted(len(message.tokens) for message in client.messages) == [203, 500, 500]
+    assert {message.notification.title for message in client.messages} == {"Распродажа"}
+    broadcast.refresh_from_db()
+    assert (broadcast.status, broadcast.sent, broadcast.failed, broadcast.pruned) == (2, 1190, 13, 13)
+    assert not User.objects.filter(fcm_token__startswith="dead").exists()
+    assert User.objects.filter(fcm_token="muted").exists()
+
+
+class RejectingMessaging(FakeMessaging):
+    """FCM, отвергающий само сообщение: ошибка приходит по каждому токену."""
+
+    def send_each_for_multicast(self, message):
+        self.messages.append(message)
+        return FakeBatchResponse([FakeResponse(InvalidArgumentError("bad image url")) for _ in message.tokens])
+
+
+def test_invalid_message_does_not_prune_tokens(recipients, notification):
+    broadcast = Broadcast.objects.create(notification=notification, total=RECIPIENTS)
+
+    engine.run_broadcast(broadcast.pk, RejectingMessaging())
+
+    broadcast.refresh_from_db()
+    assert (broadcast.sent, broadcast.failed, broadcast.pruned) == (0, RECIPIENTS, 0)
+    assert User.objects.filter(fcm_token__isnull=False).count() == RECIPIENTS + 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_admin_action_runs_broadcast_in_background(recipients, notification, admin_client, monkeypatch):
+    client = FakeMessaging()
+    monkeypatch.setattr(engine, "messaging", client)
+
+    response = admin_client.post("/admin/advertisement/notification/", {
+        "action": "send_notification", "_selected_action": [notification.pk],
+    })
+
+    assert response.status_code == 302  # noqa: PLR2004
+    broadcast = Broadcast.objects.get(notification=notification)
+    assert broadcast.total == RECIPIENTS
+    deadline = time.monotonic() + 10
+    while broadcast.status < 2 and time.monotonic() < deadline:  # noqa: PLR2004
+        time.sleep(0.05)
+        broadcast.refresh_from_db()
+    assert (broadcast.status, broadcast.sent + broadcast.failed) == (2, RECIPIENTS)
+
+
+def test_background_failure_marks_broadcast_failed(notification, monkeypatch):
+    broadcast = Broadcast.objects.create(notification=notification, total=0)
+
+    def broken(broadcast_id):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(engine, "run_broadcast", broken)
+    # Настоящее соединение закрывать нельзя: тест идёт внутри транзакции.
+    monkeypatch.setattr(engine, "connection", type("Connection", (), {"close": lambda self: None})())
+    engine._run_in_background(broadcast.pk)
+
+    broadcast.refresh_from_db()
+    assert broadcast.status == 3  # noqa: PLR2004
+    assert broadcast.finished_at is not None
@@ -1,68 +1,88 @@
 import django_filters
-from django.db.models import Avg, Q
-from namito.catalog.models import Product, Category
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q
+from django_filters.constants import EMPTY_VALUES
+
+from namito.catalog.models import Product, Category, Variant
 
 
 class ProductFilter(django_filters.FilterSet):
+    """
+    Фильтры по вариантам (цена, цвет, размер) собираются в один EXISTS-подзапрос,
+    поэтому список продуктов не размножается джойнами и не требует distinct().
+    """
     name = django_filters.CharFilter(field_name="name", lookup_expr='icontains')
-    min_price = django_filters.NumberFilter(field_name="variants__price", lookup_expr='gte')
-    max_price = django_filters.NumberFilter(field_name="variants__price", lookup_expr='lte')
+    min_price = django_filters.NumberFilter()
+    max_price = django_filters.NumberFilter()
     brand = django_filters.CharFilter(method='filter_by_brands')
     category_slug = django_filters.CharFilter(method='filter_by_category_slug')
     min_rating = django_filters.NumberFilter(method='filter_by_min_rating')
     has_discount = django_filters.BooleanFilter(method='filter_by_discount_presence')
-    color = django_filters.CharFilter(method='filter_by_colors')
-    size = django_filters.CharFilter(method='filter_by_sizes')
+    color = django_filters.CharFilter()
+    color_id = django_filters.CharFilter()
+    size = django_filters.CharFilter()
+
+    # Условия на один и тот же вариант продукта.
+    variant_lookups = {
+        'min_price': 'price__gte',
+        'max_price': 'price__lte',
+        'color': 'color_id__in',
+        'color_id': 'color_id__in',
+        'size': 'size__name__in',
+    }
 
     class Meta:
         model = Product
         fields = ['name', 'min_price', 'max_price', 'brand', 'category_slug',
-                  'min_rating', 'has_discount', 'color', 'size']
+                  'min_rating', 'has_discount', 'color', 'color_id', 'size']
+
+    def get_variant_value(self, name, value):
+        if name == 'color_id':
+            # color_id можно передать несколько раз: ?color_id=1&color_id=2
+            return [color for values in self.data.getlist(name) for color in values.split(',')]
+        if name in ('color', 'size'):
+            return value.split(',')
+        return value
+
+    def filter_queryset(self, queryset):
+        variant_filters = Q()
+        for name, value in self.form.cleaned_data.items():
+            if value in EMPTY_VALUES:
+                continue
+            if name in self.variant_lookups:
+                variant_filters &= Q(**{self.variant_lookups[name]: self.get_variant_value(name, value)})
+            else:
+                queryset = self.filters[name].filter(queryset, value)
+
+        if variant_filters:
+            variants = Variant.objects.filter(variant_filters, product=OuterRef('pk'))
+            queryset = queryset.filter(Exists(variants))
+        return queryset
 
     def filter_by_category_slug(self, queryset, name, value):
         category = Category.objects.filter(slug=value).first()
         if category:
-            descendant_categories = category.get_descendants(include_self=True)
-            return queryset.filter(category__in=descendant_categories)
+            return queryset.filter(
+                category__tree_id=category.tree_id,
+                category__lft__gte=category.lft,
+                category__rght__lte=category.rght
+            )
         return queryset.none()
 
     def filter_by_brands(self, queryset, name, value):
         brands = value.split(',')
         return queryset.filter(brand__name__in=brands)
 
-    def filter_by_colors(self, queryset, name, value):
-        colors = value.split(',')
-        return queryset.filter(variants__color__id__in=colors)
-
-    def filter_by_sizes(self, queryset, name, value):
-        sizes = value.split(',')
-        return queryset.filter(variants__size__name__in=sizes)
-
     def filter_by_min_rating(self, queryset, name, value):
-        queryset = queryset.annotate(
-            avg_rating=Avg('reviews__rating')  # Обратите внимание на путь к рейтингу
-        ).filter(
-            Q(avg_rating__gte=value) | Q(avg_rating__isnull=False)
-        )
-        return queryset.distinct()
+        return queryset.filter(summary__average_rating__gte=value)
 
     def filter_by_discount_presence(self, queryset, name, value):
-        if value:
-            return queryset.filter(
-                Q(variants__discount_value__gt=0) &
-                Q(variants__discount_type__isnull=False)
-            ).distinct()
-        else:
-            return queryset.exclude(
-                Q(variants__discount_value__gt=0) &
-                Q(variants__discount_type__isnull=False)
-            ).distinct()
+        return queryset.filter(summary__has_discount=value)
 
     def sort_by_discount(self, queryset, order):
         if order == 'asc':
-            return queryset.order_by('variants__discount_value').distinct()
+            return queryset.order_by('summary__max_discount')
         elif order == 'desc':
-            return queryset.order_by('-variants__discount_value').distinct()
+            return queryset.order_by('-summary__max_discount')
         else:
             return queryset
 
@@ -70,35 +90,36 @@ class ProductFilter(django_filters.FilterSet):
     def qs(self):
         queryset = super().qs
 
-        # Применяем фильтры из запроса
-        queryset = self.apply_filters(queryset)
-
         # Обрабатываем сортировку по скидке, если требуется
-        sort_by_discount = self.request.GET.get('sort_by_discount')
+        sort_by_discount = self.request.GET.get('sort_by_discount') if self.request else None
         if sort_by_discount:
             queryset = self.sort_by_discount(queryset, sort_by_discount)
 
-        return queryset.distinct()
-
-    def apply_filters(self, queryset):
-        if self.request:
-            if 'min_price' in self.request.GET:
-                queryset = queryset.filter(variants__price__gte=self.request.GET['min_price'])
-            if 'max_price' in self.request.GET:
-                queryset = queryset.filter(variants__price__lte=self.request.GET['max_price'])
-            if 'color_id' in self.request.GET:
-                queryset = self.filter_by_colors(queryset, 'color_id', self.request.GET.getlist('color_id'))
-            if 'size' in self.request.GET:
-                queryset = self.filter_by_sizes(queryset, 'size', self.request.GET.get('size'))
-            if 'brand' in self.request.GET:
-                queryset = self.filter_by_brands(queryset, 'brand', self.request.GET.get('brand'))
-            if 'category_slug' in self.request.GET:  # измененная часть
-                queryset = self.filter_by_category_slug(queryset, 'category_slug',
-                                                        self.request.GET.get('category_slug'))
-            if 'min_rating' in self.request.GET:
-                queryset = self.filter_by_min_rating(queryset, 'min_rating', float(self.request.GET['min_rating']))
-            if 'has_discount' in self.request.GET:
-                has_discount = self.request.GET['has_discount'].lower() == 'true'
-                queryset = self.filter_by_discount_presence(queryset, 'has_discount', has_discount)
-
         return queryset
+
+
+def get_facets(queryset):
+    """
+    Количество продуктов по каждому бренду, цвету и размеру, а также диапазон цен
+    для отфильтрованного queryset. Четыре сгруппированных запроса вне зависимости
+    от числа значений.
+    """
+    product_ids = queryset.order_by().values('pk')
+    products = Product.objects.filter(pk__in=product_ids)
+    variants = Variant.objects.filter(product__in=product_ids)
+
+    brands = products.exclude(brand=None).values('brand_id', 'brand__name').annotate(
+        count=Count('pk')).order_by('brand__name')
+    colors = variants.values('color_id', 'color__name', 'color__color').annotate(
+        count=Count('product', distinct=True)).order_by('color__name')
+    sizes = variants.values('size_id', 'size__name').annotate(
+        count=Count('product', distinct=True)).order_by('size__name')
+    prices = variants.aggregate(min=Min('price'), max=Max('price'))
+
+    return {
+        'brands': [{'id': row['brand_id'], 'name': row['brand__name'], 'count': row['count']} for row in brands],
+        'colors': [{'id': row['color_id'], 'name': row['color__name'], 'color': row['color__color'],
+                    'count': row['count']} for row in colors],
+        'sizes': [{'id': row['size_id'], 'name': row['size__name'], 'count': row['count']} for row in sizes],
+        'price': prices,
+    }
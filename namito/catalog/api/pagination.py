@@ -1,7 +1,22 @@
+import binascii
+import hashlib
+import json
 import math
+from base64 import b64decode, b64encode
+from datetime import datetime
+from functools import reduce
 
-from rest_framework.pagination import PageNumberPagination
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+from namito.catalog.models import Brand, Category, Product, ProductView, Review, Variant
+from namito.pages.cache import get_model_versions
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -17,3 +32,121 @@ class CustomPageNumberPagination(PageNumberPagination):
             'page_size': self.page_size,
             'total_pages': total_pages
         })
+
+
+class ProductKeysetPagination(BasePagination):
+    """
+    Курсорная пагинация по текущей сортировке queryset с id в качестве
+    последнего ключа. Страницы выбираются условием по ключам сортировки без
+    OFFSET, а общее количество берётся из кэша, пока продукты не изменятся.
+    """
+    page_size = 20
+    cursor_query_param = 'cursor'
+    count_timeout = 60 * 5
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        self.count = self.get_count(queryset)
+
+        values, reverse = self.decode_cursor(request.query_params.get(self.cursor_query_param))
+        if values is not None:
+            queryset = queryset.filter(self.get_position_filter(values, reverse))
+        ordering = [self.invert(field) for field in self.ordering] if reverse else self.ordering
+        page = list(queryset.order_by(*ordering)[:self.page_size + 1])
+
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, values is not None
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'products': data,
+            'page_size': self.page_size,
+            'total_pages': math.ceil(self.count / self.page_size)
+        })
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    def get_ordering(self, queryset):
+        ordering = [field for field in queryset.query.order_by if field.lstrip('-') not in ('pk', 'id')]
+        return [*ordering, 'pk']
+
+    def get_count(self, queryset):
+        sql, params = queryset.order_by().values('pk').query.sql_with_params()
+        versions = get_model_versions((Product, Variant, Review, ProductView, Category, Brand))
+        digest = hashlib.md5(f'{sql}:{params}:{sorted(versions.items())}'.encode(), usedforsecurity=False)
+        key = f'catalog:product-count:{digest.hexdigest()}'
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, self.count_timeout)
+        return count
+
+    @staticmethod
+    def get_field_filter(name, value, after):
+        """
+        Условие "значение поля дальше value" в порядке по возрастанию (after)
+        или по убыванию. PostgreSQL ставит NULL после всех значений при ASC и
+        перед ними при DESC, поэтому NULL считается наибольшим значением.
+        Так работают поля с NULL, например name_en у непереведённых продуктов.
+        """
+        if value is None:
+            return Q(pk__in=[]) if after else Q(**{f'{name}__isnull': False})
+        if after:
+            return Q(**{f'{name}__gt': value}) | Q(**{f'{name}__isnull': True})
+        return Q(**{f'{name}__lt': value})
+
+    def get_position_filter(self, values, reverse):
+        # (a, b, pk) > (x, y, z) разворачивается в a > x OR (a = x AND b > y) OR ...
+        position = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip('-')
+            after = field.startswith('-') == reverse
+            position |= equal & self.get_field_filter(name, value, after)
+            equal &= Q(**{f'{name}__isnull': True} if value is None else {name: value})
+        return position
+
+    def get_values(self, obj):
+        values = [reduce(getattr, field.lstrip('-').split('__'), obj) for field in self.ordering]
+        # DjangoJSONEncoder обрезает время до миллисекунд, а курсору нужна точность базы.
+        return [value.isoformat() if isinstance(value, datetime) else value for value in values]
+
+    def encode_cursor(self, obj, reverse):
+        payload = json.dumps({'v': self.get_values(obj), 'r': reverse}, cls=DjangoJSONEncoder)
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, b64encode(payload.encode()).decode())
+
+    def decode_cursor(self, cursor):
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(b64decode(cursor.encode()))
+            values, reverse = payload['v'], bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(_('Invalid cursor'))
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(_('Invalid cursor'))
+        return values, reverse
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
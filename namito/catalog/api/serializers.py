@@ -1,5 +1,4 @@
-from django.db import models
-from django.db.models import Avg
+from django.db.models import Avg, Prefetch
 from django.conf import settings
 
 from rest_framework import serializers
@@ -18,12 +17,23 @@ from namito.catalog.models import (
     SizeChart,
     Tag,
     Characteristic,
-    ReviewImage
+    ReviewImage,
+    ProductSummary
 )
-from namito.orders.models import CartItem, OrderedItem
+from namito.catalog.api.pagination import CustomPageNumberPagination
+from namito.catalog.category_tree import build_category_tree, get_category_tree, render_categories
+from namito.catalog.personalization import USER_FIELDS
+from namito.orders.models import OrderedItem
 from namito.users.api.serializers import UserProfileSerializer
 
 
+def get_product_summary(product):
+    try:
+        return product.summary
+    except ProductSummary.DoesNotExist:
+        return None
+
+
 class CategorySerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
     brands = serializers.SerializerMethodField()
@@ -36,42 +46,28 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'type', 'slug', 'image', 'parent', 'order', 'meta_title', 'meta_image',
                   'promotion', 'children', 'background_color', 'brands', 'sizes', 'colors', 'icon']
 
-    def get_fields(self):
-        fields = super().get_fields()
-        return fields
+    def get_node(self, obj):
+        tree = self.context.get('category_tree')
+        if tree is None:
+            tree = self.context['category_tree'] = get_category_tree()
+        if obj.id not in tree['nodes']:  # Категория создана после сборки кэша
+            tree = self.context['category_tree'] = build_category_tree()
+        return tree['nodes'][obj.id]
 
     def get_children(self, obj):
-        if 'serialized_categories' not in self.context:
-            self.context['serialized_categories'] = set()
-        if obj.id in self.context['serialized_categories']:
-            return []
-        self.context['serialized_categories'].add(obj.id)
-        serializer = CategorySerializer(obj.children.all(), many=True, context=self.context)
-        return serializer.data
+        return render_categories(self.get_node(obj)['children'], self.context.get('request'))
 
     def get_brands(self, obj):
-        brands = Brand.objects.filter(categories=obj)
-        data = [{'name': brand.name, 'logo': brand.logo.url if brand.logo else None} for brand in brands]
-        return data
+        return self.get_node(obj)['brands']
 
     def get_sizes(self, obj):
-        sizes = Size.objects.filter(categories=obj)
-        size_data = [{'id': size.id, 'name': size.name} for size in sizes]
-        return size_data
+        return self.get_node(obj)['sizes']
 
     def get_colors(self, obj):
-        colors = Color.objects.all()
-        data = [{'id': color.id, 'name': color.name, 'color': color.color} for color in colors]
-        return data
+        return self.get_node(obj)['colors']
 
     def get_parent(self, obj):
-        if obj.parent:
-            return {
-                'id': obj.parent.id,
-                'name': obj.parent.name,
-                'slug': obj.parent.slug
-            }
-        return None
+        return self.get_node(obj)['parent']
 
 
 class CategoryBySlugSerializer(CategorySerializer):
@@ -81,16 +77,24 @@ class CategoryBySlugSerializer(CategorySerializer):
         fields = CategorySerializer.Meta.fields + ['products']
 
     def get_products(self, obj):
-        def get_all_products(category):
-            products = list(category.products.filter(variants__isnull=False).distinct())
-            for child in category.children.all():
-                products.extend(get_all_products(child))
-            return products
+        """
+        Продукты категории и всех её подкатегорий одним запросом по границам lft/rght,
+        постранично.
+        """
+        request = self.context.get('request')
+        products = Product.objects.filter(
+            category__tree_id=obj.tree_id,
+            category__lft__gte=obj.lft,
+            category__rght__lte=obj.rght,
+            summary__price__isnull=False,
+            summary__has_images=True
+        ).order_by('name', 'pk')
+        products = ProductListSerializer.setup_eager_loading(products)
 
-        products = get_all_products(obj)
-        products_with_images = [product for product in products if Image.objects.filter(product=product).exists()]
-        serializer = ProductListSerializer(products_with_images, many=True, context=self.context)
-        return serializer.data
+        paginator = CustomPageNumberPagination()
+        page = paginator.paginate_queryset(products, request)
+        serializer = ProductListSerializer(page, many=True, context=self.context)
+        return paginator.get_paginated_response(serializer.data).data
 
 
 class BrandSerializer(serializers.ModelSerializer):
@@ -180,10 +184,32 @@ class ProductListSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'category', 'price', 'brand', 'average_rating', 'tags', 'is_favorite',
                   'cart_quantity', 'images', 'characteristics']
 
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Загружает всё, что нужно для страницы продуктов, фиксированным числом запросов,
+        независимо от размера страницы.
+        """
+        return queryset.select_related('category', 'brand', 'summary').prefetch_related(
+            'tags',
+            'characteristics',
+            Prefetch('images', queryset=Image.objects.order_by('id')),
+            Prefetch('variants', queryset=Variant.objects.select_related('color', 'size').order_by('id')),
+        )
+
     def get_price(self, product):
-        main_variant = Variant.objects.filter(product=product, main=True).first()
+        summary = get_product_summary(product)
+        if summary is not None:
+            if summary.price is not None:
+                return {
+                    'price': summary.price,
+                    'reduced_price': summary.discounted_price
+                }
+            return {'price': 0, 'discount': 0}
+        variants = product.variants.all()
+        main_variant = next((variant for variant in variants if variant.main), None)
         if not main_variant:
-            main_variant = Variant.objects.filter(product=product).first()
+            main_variant = next(iter(variants), None)
         if main_variant:
             price = main_variant.price
             discount = main_variant.get_price()
@@ -194,7 +220,11 @@ class ProductListSerializer(serializers.ModelSerializer):
         return {'price': 0, 'discount': 0}
 
     def get_average_rating(self, product):
-        average = Review.objects.filter(product=product).aggregate(Avg('rating'))['rating__avg']
+        summary = get_product_summary(product)
+        if summary is not None:
+            average = summary.average_rating
+        else:
+            average = Review.objects.filter(product=product).aggregate(Avg('rating'))['rating__avg']
         if average is None:
             return 0
         return round(average, 2)
@@ -203,39 +233,30 @@ class ProductListSerializer(serializers.ModelSerializer):
         tags_qs = product.tags.all()
         return TagSerializer(tags_qs, many=True).data
 
+    # Выдача одинакова для всех пользователей и кэшируется, персональные поля
+    # накладывает namito.catalog.personalization.PersonalizedResponseMixin.
     def get_is_favorite(self, product):
-        user = self.context.get('request').user if 'request' in self.context else None
-        if user and user.is_authenticated:
-            return Favorite.objects.filter(user=user, product=product).exists()
-        return False
+        return USER_FIELDS['is_favorite']
 
     def get_cart_quantity(self, product):
-        user = self.context.get('request').user if 'request' in self.context else None
-        if user and user.is_authenticated:
-            quantity = CartItem.objects.filter(
-                cart__user=user,
-                product_variant__product=product,
-                to_purchase=True
-            ).aggregate(total_quantity=models.Sum('quantity'))['total_quantity']
-            return quantity if quantity else 0
-        return 0
+        return USER_FIELDS['cart_quantity']
 
     def get_images(self, product):
         request = self.context.get('request')
-        images = Image.objects.filter(product=product)[:3]  # Ограничение до трех изображений
+        images = product.images.all()[:3]  # Ограничение до трех изображений
         if request is not None:
             return [request.build_absolute_uri(image.image.url) for image in images if image.image]
         return [image.image.url for image in images if image.image]
 
     def get_characteristics(self, product):
-        characteristics = Characteristic.objects.filter(product=product)
+        characteristics = product.characteristics.all()
         return CharacteristicsSerializer(characteristics, many=True).data
 
     def to_representation(self, instance):
-        if not Image.objects.filter(product=instance).exists():  # Проверка наличия изображений
+        if not instance.images.all():  # Проверка наличия изображений
             return None
         representation = super().to_representation(instance)
-        variants = Variant.objects.filter(product=instance)
+        variants = instance.variants.all()
         representation['variants'] = VariantSerializer(variants, many=True).data
         return representation
 
@@ -269,6 +290,9 @@ class ProductSerializer(serializers.ModelSerializer):
         return VariantSerializer(variants_qs, many=True, context=self.context).data
 
     def get_average_rating(self, product):
+        summary = get_product_summary(product)
+        if summary is not None:
+            return round(summary.average_rating, 2)
         average = Review.objects.filter(product=product).aggregate(Avg('rating'))['rating__avg']
         if average is None:
             return 0
@@ -278,22 +302,12 @@ class ProductSerializer(serializers.ModelSerializer):
         tags_qs = product.tags.all()
         return TagSerializer(tags_qs, many=True).data
 
+    # Персональные поля заполняет PersonalizedResponseMixin, см. ProductListSerializer.
     def get_is_favorite(self, obj):
-        user = self.context.get('request').user if 'request' in self.context else None
-        if user and user.is_authenticated:
-            return Favorite.objects.filter(user=user, product=obj).exists()
-        return False
+        return USER_FIELDS['is_favorite']
 
     def get_cart_quantity(self, obj):
-        user = self.context.get('request').user if 'request' in self.context else None
-        if user and user.is_authenticated:
-            quantity = CartItem.objects.filter(
-                cart__user=user,
-                product_variant__product=obj,
-                to_purchase=True
-            ).aggregate(total_quantity=models.Sum('quantity'))['total_quantity']
-            return quantity if quantity else 0
-        return 0
+        return USER_FIELDS['cart_quantity']
 
     def get_characteristics(self, product):
         characteristics = Characteristic.objects.filter(product=product)
@@ -301,23 +315,17 @@ class ProductSerializer(serializers.ModelSerializer):
 
     def get_reviews(self, product):
         reviews_qs = Review.objects.filter(product=product).order_by('-created_at')[:5]
-        return ReviewSerializer(reviews_qs, many=True, context=self.context).data
+        return ReviewSerializer(reviews_qs, many=True, context={**self.context, 'public': True}).data
 
     def get_review_count(self, product):
+        summary = get_product_summary(product)
+        if summary is not None:
+            return summary.review_count
         review_count = Review.objects.filter(product=product).count()
         return review_count
 
     def get_review_allowed(self, product):
-        user = self.context.get('request').user
-        if user.is_authenticated:
-            variants = Variant.objects.filter(product=product)
-            has_purchased_product = OrderedItem.objects.filter(
-                order__user=user,
-                product_variant__in=variants,
-                order__status=1
-            ).exists()
-            return has_purchased_product
-        return False
+        return USER_FIELDS['review_allowed']
 
     def get_images(self, product):
         request = self.context.get('request')
@@ -370,6 +378,9 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def get_review_allowed(self, obj):
         request = self.context.get('request', None)
+        if self.context.get('public'):
+            # Отзывы внутри общей выдачи продукта, значение наложит personalize.
+            return USER_FIELDS['review_allowed']
         if request and request.user.is_authenticated:
             user = request.user
             product = obj.product
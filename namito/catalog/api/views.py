@@ -1,7 +1,6 @@
 from django_filters.rest_framework import DjangoFilterBackend
 from django.shortcuts import get_object_or_404
-from django.db.models import Q, Max, Count, Min
-from django.db import models
+from django.db.models import F, Prefetch
 
 from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
@@ -10,7 +9,6 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.filters import OrderingFilter
 
 from drf_yasg.utils import swagger_auto_schema
-from modeltranslation.translator import translator
 
 from namito.catalog.models import (
     Category,
@@ -22,8 +20,12 @@ from namito.catalog.models import (
     Review,
     Favorite,
     SizeChart,
+    SizeChartItem,
     Brand,
-    ProductView
+    ProductView,
+    ReviewImage,
+    Characteristic,
+    Tag
 )
 from .serializers import (
     CategorySerializer,
@@ -45,24 +47,40 @@ from .serializers import (
     CategorySeoSerializer
 
 )
-from .pagination import CustomPageNumberPagination
-from .filters import ProductFilter
-from ...orders.models import OrderedItem
-
-
-class CategoryListView(generics.ListAPIView):
+from namito.catalog.category_tree import get_category_tree, render_categories
+from namito.catalog.personalization import PersonalizedResponseMixin
+from namito.catalog.search import search_products
+from namito.catalog.suggest import suggest
+from namito.catalog.top_products import sample_top_products
+from namito.pages.cache import CachedResponseMixin, ConditionalGetMixin
+from .pagination import CustomPageNumberPagination, ProductKeysetPagination
+from .filters import ProductFilter, get_facets
+from ...orders.models import CartItem, Order, OrderedItem
+
+
+class CategoryListView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = CategorySerializer
+    cache_models = (Category, Brand, Size, Color)
 
     def get_queryset(self):
         return Category.objects.filter(parent=None)
 
+    def list(self, request, *args, **kwargs):
+        roots = get_category_tree()['roots']
+        return Response(render_categories(roots, request))
+
 
-class CategoryPromotionListView(generics.ListAPIView):
+class CategoryPromotionListView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = CategorySerializer
+    cache_models = (Category, Brand, Size, Color)
 
     def get_queryset(self):
         return Category.objects.filter(parent=None, promotion=True)
 
+    def list(self, request, *args, **kwargs):
+        roots = [node for node in get_category_tree()['roots'] if node['promotion']]
+        return Response(render_categories(roots, request))
+
 
 class BrandListView(generics.ListAPIView):
     queryset = Category.objects.all()
@@ -74,23 +92,44 @@ class BrandDetailView(generics.RetrieveAPIView):
     serializer_class = BrandSerializer
 
 
-class ProductListView(generics.ListAPIView):
+class ProductListView(PersonalizedResponseMixin, CachedResponseMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
+    base_cache_models = (Product, Variant, Color, Size, Image, Review, Tag, Characteristic, Brand, Category)
+    cache_authenticated = True
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_class = ProductFilter
     pagination_class = CustomPageNumberPagination
     ordering_fields = ['name', 'max_discount', 'popularity', 'created_at', 'min_variant_price']
     ordering = ['name']
 
+    @property
+    def paginator(self):
+        # Курсорная пагинация включается параметром pagination=cursor или самим курсором.
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if params.get('pagination') == 'cursor' or ProductKeysetPagination.cursor_query_param in params:
+                self._paginator = ProductKeysetPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    @property
+    def cache_models(self):
+        # Просмотры меняют популярность, но сбрасывают кэш только списков с сортировкой по ней.
+        ordering = self.request.query_params.get('ordering', '')
+        if 'popularity' in {field.strip().lstrip('-') for field in ordering.split(',')}:
+            return (*self.base_cache_models, ProductView)
+        return self.base_cache_models
+
     def get_queryset(self):
         queryset = Product.objects.annotate(
-            max_discount=Max('variants__discount_value'),
-            popularity=Count('views'),
-            min_variant_price=Min('variants__price')
+            max_discount=F('summary__max_discount'),
+            popularity=F('summary__popularity'),
+            min_variant_price=F('summary__min_price')
         ).filter(
             active=True,
-            variants__isnull=False
-        ).distinct()
+            summary__price__isnull=False
+        )
 
         ordering_param = self.request.query_params.get('ordering')
         if ordering_param == 'popularity':
@@ -106,7 +145,7 @@ class ProductListView(generics.ListAPIView):
         else:
             queryset = queryset.order_by('name')
 
-        return queryset
+        return ProductListSerializer.setup_eager_loading(queryset)
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -116,39 +155,35 @@ class ProductListView(generics.ListAPIView):
             serializer = self.get_serializer(page, many=True)
             # Убедитесь, что None значения фильтруются
             data = [item for item in serializer.data if item is not None]
-            return self.get_paginated_response(data)
+            response = self.get_paginated_response(data)
+            if request.query_params.get('facets', '').lower() == 'true':
+                response.data['facets'] = get_facets(queryset)
+            return response
 
         serializer = self.get_serializer(queryset, many=True)
         data = [item for item in serializer.data if item is not None]
         return Response(data)
 
 
-class TopProductListView(generics.ListAPIView):
+class TopProductListView(PersonalizedResponseMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
 
     def get_queryset(self):
-        # Сначала фильтруем продукты с изображениями
-        queryset = Product.objects.annotate(image_count=models.Count('images')).filter(
-            is_top=True,
-            image_count__gt=0
-        ).distinct()
+        queryset = ProductListSerializer.setup_eager_loading(Product.objects.all())
+        return sample_top_products(queryset, 15)
 
-        # Применяем случайный порядок и срезку
-        queryset = queryset.order_by('?')[:15]
 
-        return queryset
-
-
-class NewProductListView(generics.ListAPIView):
+class NewProductListView(PersonalizedResponseMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
 
     def get_queryset(self):
-        return Product.objects.filter(
+        queryset = Product.objects.filter(
             is_new=True
-        ).distinct().order_by('-id')[:15]
+        ).distinct().order_by('-id')
+        return ProductListSerializer.setup_eager_loading(queryset)[:15]
 
 
-class SimilarProductsView(generics.ListAPIView):
+class SimilarProductsView(PersonalizedResponseMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
 
     def get_queryset(self):
@@ -156,8 +191,8 @@ class SimilarProductsView(generics.ListAPIView):
         product = get_object_or_404(Product, pk=product_id)
         queryset = Product.objects.filter(
             category=product.category,
-        ).exclude(pk=product_id).distinct()[:10]
-        return queryset
+        ).exclude(pk=product_id).distinct()
+        return ProductListSerializer.setup_eager_loading(queryset)[:10]
 
     def list(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
@@ -167,24 +202,27 @@ class SimilarProductsView(generics.ListAPIView):
         return Response(data)
 
 
-class ProductDetailView(generics.RetrieveAPIView):
-    queryset = Product.objects.all()
+class ProductDetailView(ConditionalGetMixin, PersonalizedResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    queryset = Product.objects.select_related('summary')
     serializer_class = ProductSerializer
+    # Профили авторов отзывов меняют версию Review (см. catalog/signals.py), а не User:
+    # версию User обновляет каждый вход и смена токена FCM.
+    cache_models = (Product, Variant, Color, Size, Image, Review, ReviewImage, Tag, Characteristic, Brand, Category)
+    # review_allowed зависит от статуса заказа, а не только от его позиций.
+    user_cache_models = (Favorite, CartItem, OrderedItem, Order)
+    cache_authenticated = True
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['request'] = self.request
         return context
 
-    def retrieve(self, request, *args, **kwargs):
-        instance = self.get_object()
-        user = request.user
-
-        if user.is_authenticated:
-            ProductView.objects.get_or_create(product=instance, user=user)
-
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        # Просмотр записывается и тогда, когда продукт отдан из кэша.
+        if response.status_code == 200 and response.data and request.user.is_authenticated:  # noqa: PLR2004
+            ProductView.objects.get_or_create(product_id=response.data['id'], user=request.user)
+        return response
 
 
 class ColorCreateView(generics.CreateAPIView):
@@ -354,17 +392,19 @@ class FavoriteToggleAPIView(APIView):
         return Response({"message": message}, status=status.HTTP_200_OK)
 
 
-class FavoriteListView(generics.ListAPIView):
+class FavoriteListView(PersonalizedResponseMixin, generics.ListAPIView):
     serializer_class = FavoriteSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
         user = self.request.user
-        return Favorite.objects.filter(user=user)
+        products = ProductListSerializer.setup_eager_loading(Product.objects.all())
+        return Favorite.objects.filter(user=user).prefetch_related(Prefetch('product', queryset=products))
 
 
-class SizeChartListView(generics.ListAPIView):
+class SizeChartListView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = SizeChartSerializer
+    cache_models = (SizeChart, SizeChartItem)
 
     def get_queryset(self):
         queryset = SizeChart.objects.all()
@@ -374,7 +414,7 @@ class SizeChartListView(generics.ListAPIView):
         return queryset
 
 
-class CategoryBySlugAPIView(generics.ListAPIView):
+class CategoryBySlugAPIView(PersonalizedResponseMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategoryBySlugSerializer
     lookup_field = 'slug'
@@ -406,13 +446,24 @@ class CategoryByNameStartsWithAPIView(generics.ListAPIView):
         return queryset
 
 
-class ProductSearchByNameAndBrandAPIView(generics.ListAPIView):
+class SuggestAPIView(APIView):
+    """Подсказки названий продуктов, брендов и категорий по началу слова."""
+    authentication_classes = []
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'products': [], 'brands': [], 'categories': []})
+        return Response(suggest(query))
+
+
+class ProductSearchByNameAndBrandAPIView(PersonalizedResponseMixin, generics.ListAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductListSerializer
+    pagination_class = CustomPageNumberPagination
 
     def get_queryset(self):
         queryset = super().get_queryset()
-        language_code = self.request.LANGUAGE_CODE
 
         search_query = self.request.query_params.get('name')
         brand_query = self.request.query_params.get('brand')
@@ -420,26 +471,14 @@ class ProductSearchByNameAndBrandAPIView(generics.ListAPIView):
         if search_query is None and brand_query is None:
             return queryset.none()
 
-        filters = Q()
-
-        if search_query:
-            product_translation_opts = translator.get_options_for_model(Product)
-            for field in product_translation_opts.fields:
-                translated_field = f"{field}_{language_code}"
-                filters |= Q(**{f"{translated_field}__icontains": search_query})
+        queryset = search_products(queryset.filter(summary__has_images=True), self.request.LANGUAGE_CODE,
+                                   name=search_query, brand=brand_query)
+        return ProductListSerializer.setup_eager_loading(queryset)
 
-        if brand_query:
-            brand_translation_opts = translator.get_options_for_model(Brand)
-            for field in brand_translation_opts.fields:
-                translated_field = f"brand__{field}_{language_code}"
-                filters |= Q(**{f"{translated_field}__icontains": brand_query})
-
-        queryset = queryset.filter(filters).filter(images__isnull=False).distinct()
-        return queryset
 
-
-class ColorSizeBrandAPIView(generics.ListAPIView):
+class ColorSizeBrandAPIView(CachedResponseMixin, generics.ListAPIView):
     serializer_class = ColorSizeBrandSerializer
+    cache_models = (Color, Size, Brand)
 
     def list(self, request, *args, **kwargs):
         colors = Color.objects.all()
@@ -449,15 +488,19 @@ class ColorSizeBrandAPIView(generics.ListAPIView):
         return Response(serializer.data)
 
 
-class DiscountAPIView(generics.ListAPIView):
-    queryset = Product.objects.filter(variants__discount_value__isnull=False,
-                                      variants__discount_type__isnull=False).distinct()
+class DiscountAPIView(PersonalizedResponseMixin, generics.ListAPIView):
     serializer_class = ProductListSerializer
 
+    def get_queryset(self):
+        queryset = Product.objects.filter(variants__discount_value__isnull=False,
+                                          variants__discount_type__isnull=False).distinct()
+        return ProductListSerializer.setup_eager_loading(queryset)
+
 
-class ProductSeoAPIView(generics.RetrieveAPIView):
+class ProductSeoAPIView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSeoSerializer
+    cache_models = (Product,)
     lookup_field = 'pk'
 
     def get_object(self):
@@ -466,9 +509,10 @@ class ProductSeoAPIView(generics.RetrieveAPIView):
 
 
 
-class CategorySeoAPIView(generics.RetrieveAPIView):
+class CategorySeoAPIView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySeoSerializer
+    cache_models = (Category,)
     lookup_field = 'slug'
 
     def get_object(self):
@@ -0,0 +1,111 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from modeltranslation.utils import get_language
+
+from namito.catalog.models import Brand, Category, Color, Size
+
+CACHE_KEY = 'catalog:category-tree:{language}'
+CACHE_TIMEOUT = 60 * 60
+
+# Поля с путями к файлам, которые при выдаче превращаются в абсолютные ссылки.
+URL_FIELDS = ('image', 'meta_image', 'icon')
+
+
+def _file_url(field_file):
+    return field_file.url if field_file else None
+
+
+def build_category_tree():
+    """
+    Собирает всё дерево категорий с брендами, размерами и цветами
+    за постоянное число запросов, используя порядок tree_id/lft из MPTT.
+    """
+    colors = [{'id': color.id, 'name': color.name, 'color': color.color}
+              for color in Color.objects.order_by('id')]
+
+    brands = {}
+    for link in Brand.categories.through.objects.select_related('brand').order_by('brand_id'):
+        brand = link.brand
+        brands.setdefault(link.category_id, []).append({'name': brand.name, 'logo': _file_url(brand.logo)})
+
+    sizes = {}
+    for link in Size.categories.through.objects.select_related('size').order_by('size_id'):
+        sizes.setdefault(link.category_id, []).append({'id': link.size.id, 'name': link.size.name})
+
+    nodes = {}
+    roots = []
+    for category in Category.objects.order_by('tree_id', 'lft'):
+        parent = nodes.get(category.parent_id)
+        node = {
+            'id': category.id,
+            'name': category.name,
+            'type': category.type,
+            'slug': category.slug,
+            'image': _file_url(category.image),
+            'parent': {'id': parent['id'], 'name': parent['name'], 'slug': parent['slug']} if parent else None,
+            'order': category.order,
+            'meta_title': category.meta_title,
+            'meta_image': _file_url(category.meta_image),
+            'promotion': category.promotion,
+            'children': [],
+            'background_color': category.background_color,
+            'brands': brands.get(category.id, []),
+            'sizes': sizes.get(category.id, []),
+            'colors': colors,
+            'icon': _file_url(category.icon),
+        }
+        nodes[category.id] = node
+        if parent:
+            parent['children'].append(node)
+        else:
+            roots.append(node)
+
+    def sort_key(node):
+        return node['order'], node['name']
+
+    roots.sort(key=sort_key)
+    for node in nodes.values():
+        node['children'].sort(key=sort_key)
+    return {'roots': roots, 'nodes': nodes}
+
+
+def get_category_tree():
+    """Дерево категорий для текущего языка из кэша."""
+    key = CACHE_KEY.format(language=get_language())
+    tree = cache.get(key)
+    if tree is None:
+        tree = build_category_tree()
+        cache.set(key, tree, CACHE_TIMEOUT)
+    return tree
+
+
+def _delete_category_tree():
+    cache.delete_many([CACHE_KEY.format(language=code) for code, _name in settings.LANGUAGES])
+
+
+def invalidate_category_tree():
+    # Удаляем после коммита: иначе параллельный запрос соберёт дерево из
+    # старых строк и закэширует его на CACHE_TIMEOUT.
+    transaction.on_commit(_delete_category_tree)
+
+
+def render_categories(nodes, request=None, fields=None):
+    """
+    Копирует узлы дерева для ответа: делает ссылки на файлы абсолютными
+    и, если указаны fields, оставляет только эти поля.
+    """
+    rendered = []
+    for node in nodes:
+        data = {}
+        for name, value in node.items():
+            if fields is not None and name not in fields:
+                continue
+            if name == 'children':
+                value = render_categories(value, request, fields)
+            elif name in URL_FIELDS and value and request is not None:
+                value = request.build_absolute_uri(value)
+            data[name] = value
+        rendered.append(data)
+    return rendered
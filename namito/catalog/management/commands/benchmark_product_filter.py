@@ -0,0 +1,86 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+from django.http import QueryDict
+
+from namito.catalog.api.filters import ProductFilter
+from namito.catalog.models import Brand, Category, Color, Product, ProductSummary, Size, Variant
+
+SCENARIOS = {
+    'color': 'color={color}',
+    'color + size': 'color={color}&size={size}',
+    'price range': 'min_price=1000&max_price=1500',
+    'category + color + price': 'category_slug={category}&color={color}&min_price=500',
+    'brand + rating + discount': 'brand={brand}&min_rating=3&has_discount=true',
+}
+
+
+class Command(BaseCommand):
+    help = ('Fills a synthetic catalog inside a rolled back transaction and prints '
+            'EXPLAIN ANALYZE of the product list for common ProductFilter combinations.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=50000, help='Number of synthetic products.')
+        parser.add_argument('--variants', type=int, default=3, help='Variants per product.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            started = time.monotonic()
+            params = self.create_catalog(options['products'], options['variants'])
+            self.stdout.write(f'Catalog created in {time.monotonic() - started:.1f}s')
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+            for name, query in SCENARIOS.items():
+                self.run_scenario(name, query.format(**params))
+            transaction.set_rollback(True)
+
+    def create_catalog(self, product_count, variants_per_product):
+        # Category.save() сохраняет дважды, поэтому objects.create() с force_insert не подходит.
+        root = Category(name='Benchmark', slug='benchmark')
+        root.save()
+        categories = [Category(name=f'Benchmark {i}', slug=f'benchmark-{i}', parent=root) for i in range(10)]
+        for category in categories:
+            category.save()
+        brands = Brand.objects.bulk_create(Brand(name=f'Benchmark brand {i}') for i in range(50))
+        colors = Color.objects.bulk_create(Color(name=f'Color {i}', color='#000000') for i in range(20))
+        sizes = Size.objects.bulk_create(Size(name=f'B{i}') for i in range(8))
+
+        products = Product.objects.bulk_create(
+            (Product(name=f'Product {i}', name_ru=f'Продукт {i}', name_en=f'Product {i}',
+                     description='', category=random.choice(categories), brand=random.choice(brands),
+                     sku=f'BENCH-{i}')
+             for i in range(product_count)),
+            batch_size=2000
+        )
+        Variant.objects.bulk_create(
+            (Variant(product=product, color=random.choice(colors), size=random.choice(sizes),
+                     price=random.randint(100, 5000), stock=10,
+                     discount_value=random.choice([None, 10]), discount_type='percent')
+             for product in products for _ in range(variants_per_product)),
+            batch_size=5000
+        )
+        ProductSummary.rebuild([product.pk for product in products])
+        return {'color': colors[0].pk, 'size': sizes[0].name, 'category': categories[0].slug,
+                'brand': brands[0].name}
+
+    def run_scenario(self, name, query):
+        queryset = Product.objects.annotate(
+            popularity=F('summary__popularity'),
+        ).filter(active=True, summary__price__isnull=False).order_by('-popularity')
+        queryset = ProductFilter(QueryDict(query), queryset=queryset).qs
+
+        started = time.monotonic()
+        count = queryset.count()
+        page = list(queryset[:20])
+        elapsed = (time.monotonic() - started) * 1000
+        plan = queryset[:20].explain(analyze=True)
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}: {query}'))
+        self.stdout.write(f'{count} products, first page of {len(page)} in {elapsed:.1f}ms')
+        self.stdout.write(plan)
+        if 'Seq Scan on catalog_variant' in plan:
+            self.stdout.write(self.style.WARNING('Variants are scanned sequentially.'))
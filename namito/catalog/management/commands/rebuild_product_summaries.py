@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from namito.catalog.models import ProductSummary
+
+
+class Command(BaseCommand):
+    help = 'Recalculates denormalized product summaries used by the catalog listings.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Only rebuild these products.')
+
+    def handle(self, *args, **options):
+        product_ids = options['product_ids'] or None
+        count = ProductSummary.rebuild(product_ids)
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {count} product summaries.'))
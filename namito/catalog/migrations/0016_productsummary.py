@@ -0,0 +1,86 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def variant_price(variant):
+    if variant.discount_value and variant.discount_type:
+        if variant.discount_type == 'percent':
+            return variant.price - (variant.discount_value / 100) * variant.price
+        if variant.discount_type == 'unit':
+            return variant.price - variant.discount_value
+    return variant.price
+
+
+def fill_product_summaries(apps, schema_editor):
+    Product = apps.get_model('catalog', 'Product')
+    ProductSummary = apps.get_model('catalog', 'ProductSummary')
+    Image = apps.get_model('catalog', 'Image')
+    ProductView = apps.get_model('catalog', 'ProductView')
+
+    products = Product.objects.order_by('pk').annotate(
+        average_rating=models.Avg('reviews__rating'),
+        review_count=models.Count('reviews', distinct=True),
+    ).annotate(
+        has_images=models.Exists(Image.objects.filter(product=models.OuterRef('pk'))),
+        popularity=models.Subquery(
+            ProductView.objects.filter(product=models.OuterRef('pk')).values('product')
+            .annotate(count=models.Count('id')).values('count')
+        ),
+    ).prefetch_related('variants')
+
+    summaries = []
+    for product in products.iterator(chunk_size=500):
+        summary = ProductSummary(
+            product_id=product.pk,
+            average_rating=product.average_rating or 0,
+            review_count=product.review_count,
+            has_images=product.has_images,
+            popularity=product.popularity or 0,
+        )
+        variants = sorted(product.variants.all(), key=lambda variant: variant.pk)
+        if variants:
+            main_variant = next((variant for variant in variants if variant.main), variants[0])
+            discounted_price = variant_price(main_variant)
+            summary.price = main_variant.price
+            summary.discounted_price = discounted_price if discounted_price != main_variant.price else None
+            summary.min_price = min(variant.price for variant in variants)
+            summary.max_discount = max((variant.discount_value for variant in variants if variant.discount_value),
+                                       default=0)
+            summary.has_discount = any(variant.discount_value and variant.discount_value > 0
+                                       and variant.discount_type for variant in variants)
+            Product.objects.filter(pk=product.pk).update(min_price=int(summary.min_price))
+        summaries.append(summary)
+    ProductSummary.objects.bulk_create(summaries, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0015_category_meta_description_alter_category_meta_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSummary',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='catalog.product', verbose_name='Продукт')),
+                ('price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Цена главного варианта')),
+                ('discounted_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Цена главного варианта со скидкой')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='Минимальная цена')),
+                ('max_discount', models.DecimalField(decimal_places=2, default=0, max_digits=10, verbose_name='Максимальная скидка')),
+                ('has_discount', models.BooleanField(default=False, verbose_name='Есть скидка')),
+                ('average_rating', models.FloatField(default=0, verbose_name='Средний рейтинг')),
+                ('review_count', models.PositiveIntegerField(default=0, verbose_name='Количество отзывов')),
+                ('has_images', models.BooleanField(default=False, verbose_name='Есть изображения')),
+                ('popularity', models.PositiveIntegerField(default=0, verbose_name='Популярность')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Время обновления')),
+            ],
+            options={
+                'verbose_name': 'Сводка продукта',
+                'verbose_name_plural': 'Сводки продуктов',
+            },
+        ),
+        migrations.RunPython(fill_product_summaries, migrations.RunPython.noop),
+    ]
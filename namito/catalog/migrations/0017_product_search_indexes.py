@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0016_productsummary'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddIndex(
+            model_name='brand',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('name', name='gin_trgm_ops'), name='brand_name_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name_ru', config='russian', weight='A'), '||', django.contrib.postgres.search.SearchVector('description_ru', config='russian', weight='B'), django.contrib.postgres.search.SearchConfig('russian')), name='product_search_ru'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.CombinedSearchVector(django.contrib.postgres.search.SearchVector('name_en', config='english', weight='A'), '||', django.contrib.postgres.search.SearchVector('description_en', config='english', weight='B'), django.contrib.postgres.search.SearchConfig('english')), name='product_search_en'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('name_ru', name='gin_trgm_ops'), name='product_name_ru_trgm'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass('name_en', name='gin_trgm_ops'), name='product_name_en_trgm'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0017_product_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(condition=models.Q(('main_image', True)), fields=['product'], name='image_product_main'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('active', True)), fields=['-created_at'], name='product_active_created'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_top', True)), fields=['id'], name='product_top'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_new', True)), fields=['-id'], name='product_new'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=models.Index(fields=['price', 'product'], name='variant_price_product'),
+        ),
+        migrations.AddIndex(
+            model_name='variant',
+            index=models.Index(condition=models.Q(('discount_type__isnull', False), ('discount_value__isnull', False)), fields=['product'], name='variant_discounted'),
+        ),
+    ]
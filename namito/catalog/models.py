@@ -3,7 +3,12 @@ import re
 import io
 import uuid
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
 from django.utils.text import slugify
 from django.utils.translation import gettext_lazy as _
 from django.core.files.base import ContentFile
@@ -104,6 +109,9 @@ class Brand(models.Model):
     class Meta:
         verbose_name = "Бренд"
         verbose_name_plural = "Бренды"
+        indexes = [
+            GinIndex(OpClass('name', name='gin_trgm_ops'), name='brand_name_trgm'),
+        ]
 
 
 class Tag(models.Model):
@@ -141,6 +149,20 @@ class Product(models.Model):
     class Meta:
         verbose_name = "Продукт"
         verbose_name_plural = "Продукты"
+        # Выражения совпадают с namito.catalog.search.product_search_vector.
+        indexes = [
+            GinIndex(SearchVector('name_ru', weight='A', config='russian')
+                     + SearchVector('description_ru', weight='B', config='russian'), name='product_search_ru'),
+            GinIndex(SearchVector('name_en', weight='A', config='english')
+                     + SearchVector('description_en', weight='B', config='english'), name='product_search_en'),
+            GinIndex(OpClass('name_ru', name='gin_trgm_ops'), name='product_name_ru_trgm'),
+            GinIndex(OpClass('name_en', name='gin_trgm_ops'), name='product_name_en_trgm'),
+            # Список продуктов с ordering=created_at.
+            models.Index(fields=['-created_at'], condition=Q(active=True), name='product_active_created'),
+            # Пул топ-продуктов и новинки.
+            models.Index(fields=['id'], condition=Q(is_top=True), name='product_top'),
+            models.Index(fields=['-id'], condition=Q(is_new=True), name='product_new'),
+        ]
 
     def get_images(self):
         base_url = settings.DEFAULT_PRODUCT_URL
@@ -206,6 +228,123 @@ class ProductView(models.Model):
         return f"{self.user} просмотрел(а) {self.product} в {self.viewed_at}"
 
 
+class ProductSummary(models.Model):
+    """
+    Денормализованные данные продукта для каталога. Обновляются сигналами
+    при сохранении и удалении вариантов, отзывов, изображений и просмотров.
+    """
+    product = models.OneToOneField(Product, primary_key=True, related_name='summary', on_delete=models.CASCADE,
+                                   verbose_name=_('Продукт'))
+    price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True,
+                                verbose_name=_('Цена главного варианта'))
+    discounted_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True,
+                                           verbose_name=_('Цена главного варианта со скидкой'))
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True,
+                                    verbose_name=_('Минимальная цена'))
+    max_discount = models.DecimalField(max_digits=10, decimal_places=2, default=0,
+                                       verbose_name=_('Максимальная скидка'))
+    has_discount = models.BooleanField(default=False, verbose_name=_('Есть скидка'))
+    average_rating = models.FloatField(default=0, verbose_name=_('Средний рейтинг'))
+    review_count = models.PositiveIntegerField(default=0, verbose_name=_('Количество отзывов'))
+    has_images = models.BooleanField(default=False, verbose_name=_('Есть изображения'))
+    popularity = models.PositiveIntegerField(default=0, verbose_name=_('Популярность'))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_('Время обновления'))
+
+    class Meta:
+        verbose_name = _("Сводка продукта")
+        verbose_name_plural = _("Сводки продуктов")
+
+    def __str__(self):
+        return f'{self.product_id}'
+
+    @staticmethod
+    def summarize_variants(variants):
+        variants = sorted(variants, key=lambda variant: variant.pk)
+        if not variants:
+            return {'price': None, 'discounted_price': None, 'min_price': None,
+                    'max_discount': 0, 'has_discount': False}
+        main_variant = next((variant for variant in variants if variant.main), variants[0])
+        discounted_price = main_variant.get_price()
+        discounts = [variant.discount_value for variant in variants if variant.discount_value]
+        return {
+            'price': main_variant.price,
+            'discounted_price': discounted_price if discounted_price != main_variant.price else None,
+            'min_price': min(variant.price for variant in variants),
+            'max_discount': max(discounts, default=0),
+            'has_discount': any(variant.discount_value and variant.discount_value > 0 and variant.discount_type
+                                for variant in variants),
+        }
+
+    @classmethod
+    def _update(cls, product_id, create_missing=True, **values):
+        updated = cls.objects.filter(product_id=product_id).update(updated_at=timezone.now(), **values)
+        if not updated and create_missing:
+            cls.rebuild([product_id])
+
+    @classmethod
+    def refresh_prices(cls, product_id, create_missing=True):
+        values = cls.summarize_variants(Variant.objects.filter(product_id=product_id))
+        cls._update(product_id, create_missing, **values)
+        min_price = values['min_price']
+        Product.objects.filter(pk=product_id).update(min_price=int(min_price) if min_price else 0)
+
+    @classmethod
+    def refresh_reviews(cls, product_id, create_missing=True):
+        aggregates = Review.objects.filter(product_id=product_id).aggregate(
+            average_rating=models.Avg('rating'), review_count=models.Count('id'))
+        cls._update(product_id, create_missing, average_rating=aggregates['average_rating'] or 0,
+                    review_count=aggregates['review_count'])
+
+    @classmethod
+    def refresh_images(cls, product_id, create_missing=True):
+        has_images = Image.objects.filter(product_id=product_id).exists()
+        cls._update(product_id, create_missing, has_images=has_images)
+
+    @classmethod
+    def change_popularity(cls, product_id, delta, create_missing=True):
+        cls._update(product_id, create_missing,
+                    popularity=Greatest(models.F('popularity') + delta, 0))
+
+    @classmethod
+    def rebuild(cls, product_ids=None, batch_size=500):
+        """Полностью пересчитывает сводки для указанных (или всех) продуктов."""
+        products = Product.objects.order_by('pk').annotate(
+            average_rating=models.Avg('reviews__rating'),
+            review_count=models.Count('reviews', distinct=True),
+        ).annotate(
+            has_images=models.Exists(Image.objects.filter(product=models.OuterRef('pk'))),
+            popularity=models.Subquery(
+                ProductView.objects.filter(product=models.OuterRef('pk')).values('product')
+                .annotate(count=models.Count('id')).values('count')
+            ),
+        ).prefetch_related('variants')
+        if product_ids is not None:
+            products = products.filter(pk__in=product_ids)
+
+        summaries = []
+        for product in products.iterator(chunk_size=batch_size):
+            variant_values = cls.summarize_variants(product.variants.all())
+            summaries.append(cls(
+                product_id=product.pk,
+                average_rating=product.average_rating or 0,
+                review_count=product.review_count,
+                has_images=product.has_images,
+                popularity=product.popularity or 0,
+                **variant_values
+            ))
+
+        fields = ['price', 'discounted_price', 'min_price', 'max_discount', 'has_discount',
+                  'average_rating', 'review_count', 'has_images', 'popularity', 'updated_at']
+        cls.objects.bulk_create(summaries, batch_size=batch_size, update_conflicts=True,
+                                unique_fields=['product'], update_fields=fields)
+        Product.objects.bulk_update(
+            [Product(pk=summary.product_id, min_price=int(summary.min_price) if summary.min_price else 0)
+             for summary in summaries],
+            ['min_price'], batch_size=batch_size
+        )
+        return len(summaries)
+
+
 class Characteristic(models.Model):
     key = models.CharField(max_length=255, null=True, blank=True, verbose_name=_('Ключь'))
     value = models.CharField(max_length=255, null=True, blank=True, verbose_name=_('Значение'))
@@ -263,6 +402,13 @@ class Variant(models.Model):
     class Meta:
         verbose_name = 'Вариант'
         verbose_name_plural = 'Варианты'
+        indexes = [
+            # Фильтр по цене в ProductFilter: диапазон цены, затем продукт.
+            models.Index(fields=['price', 'product'], name='variant_price_product'),
+            # Продукты со скидкой в DiscountAPIView.
+            models.Index(fields=['product'], name='variant_discounted',
+                         condition=Q(discount_value__isnull=False, discount_type__isnull=False)),
+        ]
 
     def __str__(self):
         return f"{self.product.name} - {self.color} - {self.size}"
@@ -287,6 +433,10 @@ class Image(ProcessedImageModel):
     class Meta:
         verbose_name = 'Изображение'
         verbose_name_plural = 'Изображения'
+        indexes = [
+            # product.images.filter(main_image=True).first()
+            models.Index(fields=['product'], condition=Q(main_image=True), name='image_product_main'),
+        ]
 
     def save(self, *args, **kwargs):
         self.process_image()
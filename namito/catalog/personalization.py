@@ -0,0 +1,86 @@
+from django.db.models import Sum
+
+from namito.catalog.models import Favorite
+from namito.orders.models import CartItem, OrderedItem
+
+# Персональные поля продукта и их значения в общей выдаче.
+USER_FIELDS = {
+    'is_favorite': False,
+    'cart_quantity': 0,
+    'review_allowed': False,
+}
+
+
+def get_user_overlay(user, product_ids, fields=tuple(USER_FIELDS)):
+    """
+    Персональные поля для продуктов product_ids, по одному запросу на поле
+    сразу для всех продуктов: {product_id: {field: value}}.
+    """
+    product_ids = set(product_ids)
+    overlay = {pk: {field: USER_FIELDS[field] for field in fields} for pk in product_ids}
+    if not product_ids:
+        return overlay
+
+    if 'is_favorite' in fields:
+        for pk in Favorite.objects.filter(user=user, product_id__in=product_ids).values_list('product_id', flat=True):
+            overlay[pk]['is_favorite'] = True
+    if 'cart_quantity' in fields:
+        quantities = (CartItem.objects.filter(cart__user=user, to_purchase=True,
+                                              product_variant__product_id__in=product_ids)
+                      .values('product_variant__product_id').annotate(total=Sum('quantity'))
+                      .values_list('product_variant__product_id', 'total'))
+        for pk, total in quantities:
+            overlay[pk]['cart_quantity'] = total
+    if 'review_allowed' in fields:
+        purchased = (OrderedItem.objects.filter(order__user=user, order__status=1,
+                                                product_variant__product_id__in=product_ids)
+                     .values_list('product_variant__product_id', flat=True).distinct())
+        for pk in purchased:
+            overlay[pk]['review_allowed'] = True
+    return overlay
+
+
+def _copy_collecting_products(data, products):
+    # Продукт в выдаче узнаётся по cart_quantity: это поле есть только у продуктов.
+    if isinstance(data, dict):
+        copied = {key: _copy_collecting_products(value, products) for key, value in data.items()}
+        if 'cart_quantity' in copied and 'id' in copied:
+            products.append(copied)
+        return copied
+    if isinstance(data, list):
+        return [_copy_collecting_products(item, products) for item in data]
+    return data
+
+
+def personalize(data, user):
+    """
+    Копия выдачи data, в которой у всех продуктов персональные поля заполнены
+    для user. Сама data не меняется, поэтому её можно брать из общего кэша.
+    """
+    products = []
+    data = _copy_collecting_products(data, products)
+    if not products:
+        return data
+
+    fields = [field for field in USER_FIELDS if any(field in product for product in products)]
+    overlay = get_user_overlay(user, {product['id'] for product in products}, fields)
+    for product in products:
+        values = overlay[product['id']]
+        product.update({field: values[field] for field in fields if field in product})
+        if 'review_allowed' in product:
+            # Отзывы на странице продукта наследуют право оставить отзыв от продукта.
+            for review in product.get('reviews') or ():
+                review['review_allowed'] = values['review_allowed']
+    return data
+
+
+class PersonalizedResponseMixin:
+    """
+    Накладывает персональные поля продуктов на готовый ответ, уже после кэша,
+    поэтому общая выдача кэшируется одна на всех пользователей.
+    """
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if response.status_code == 200 and hasattr(response, 'data') and request.user.is_authenticated:  # noqa: PLR2004
+            response.data = personalize(response.data, request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+from django.db.models import F, Q, Value
+from django.db.models.functions import Greatest
+
+# Конфигурации полнотекстового поиска Postgres для языков сайта.
+SEARCH_CONFIGS = {
+    'ru': 'russian',
+    'en': 'english',
+}
+
+
+def get_search_config(language):
+    return SEARCH_CONFIGS[language]
+
+
+def product_search_vector(language):
+    """
+    Вектор по названию и описанию продукта на языке language. Выражение совпадает
+    с GIN индексами из Product.Meta.indexes, поэтому поиск идёт по индексу.
+    """
+    config = get_search_config(language)
+    return (SearchVector(f'name_{language}', weight='A', config=config)
+            + SearchVector(f'description_{language}', weight='B', config=config))
+
+
+def search_products(queryset, language, name=None, brand=None):
+    """
+    Ищет продукты по названию и описанию (полнотекстово, с учётом опечаток
+    в названии) и/или по бренду. Результат отсортирован по релевантности.
+    """
+    if language not in SEARCH_CONFIGS:
+        language = settings.LANGUAGE_CODE
+
+    filters = Q()
+    rank = Value(0.0)
+    if name:
+        query = SearchQuery(name, config=get_search_config(language), search_type='websearch')
+        queryset = queryset.annotate(
+            search=product_search_vector(language),
+            name_rank=SearchRank(F('search'), query),
+            name_similarity=TrigramSimilarity(f'name_{language}', name),
+        )
+        filters |= Q(search=query) | Q(**{f'name_{language}__trigram_similar': name})
+        rank = Greatest(F('name_rank'), F('name_similarity'))
+    if brand:
+        queryset = queryset.annotate(brand_similarity=TrigramSimilarity('brand__name', brand))
+        filters |= Q(brand__name__trigram_similar=brand) | Q(brand__name__icontains=brand)
+        rank = Greatest(rank, F('brand_similarity'))
+
+    return queryset.filter(filters).annotate(rank=rank).order_by('-rank', 'pk')
+
@@ -1,7 +1,19 @@
-from django.db.models.signals import m2m_changed
+from django.db.models.signals import m2m_changed, post_delete, post_save
 from django.dispatch import receiver
 
-from namito.catalog.models import Brand, Size
+from mptt.signals import node_moved
+
+from namito.catalog.category_tree import invalidate_category_tree
+from namito.catalog.models import (
+    Brand, Category, Color, Image, Product, ProductSummary, ProductView, Review, Size, Variant
+)
+from namito.catalog.suggest import record_change
+from namito.pages.cache import bump_model_version
+from namito.users.api.serializers import UserProfileSerializer
+from namito.users.models import User
+
+# Поля пользователя, которые показываются в отзывах.
+REVIEW_AUTHOR_FIELDS = frozenset(UserProfileSerializer.Meta.fields)
 
 
 @receiver(m2m_changed, sender=Brand.categories.through)
@@ -20,3 +32,76 @@ def update_size_child_categories(sender, instance, action, **kwargs):
         for category in instance.categories.all():
             categories_to_update.update(category.get_descendants(include_self=True))
         instance.categories.set(categories_to_update)
+
+
+# Сводки продуктов. При удалении сводку только обновляем: если продукт удаляется
+# каскадом, новую сводку создавать нельзя.
+
+@receiver(post_save, sender=Product)
+def create_product_summary(sender, instance, created, **kwargs):
+    if created:
+        ProductSummary.objects.get_or_create(product=instance)
+
+
+@receiver(post_save, sender=Variant)
+@receiver(post_delete, sender=Variant)
+def update_summary_prices(sender, instance, **kwargs):
+    ProductSummary.refresh_prices(instance.product_id, create_missing=kwargs['signal'] is post_save)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def update_summary_reviews(sender, instance, **kwargs):
+    ProductSummary.refresh_reviews(instance.product_id, create_missing=kwargs['signal'] is post_save)
+
+
+@receiver(post_save, sender=User)
+def invalidate_review_authors(sender, instance, update_fields=None, **kwargs):
+    # Сохранение только last_login или fcm_token профиль в отзывах не меняет.
+    if update_fields is not None and not REVIEW_AUTHOR_FIELDS.intersection(update_fields):
+        return
+    if Review.objects.filter(user=instance).exists():
+        bump_model_version(Review)
+
+
+@receiver(post_save, sender=Image)
+@receiver(post_delete, sender=Image)
+def update_summary_images(sender, instance, **kwargs):
+    if instance.product_id:
+        ProductSummary.refresh_images(instance.product_id, create_missing=kwargs['signal'] is post_save)
+
+
+@receiver(post_save, sender=ProductView)
+def increase_summary_popularity(sender, instance, created, **kwargs):
+    if created:
+        ProductSummary.change_popularity(instance.product_id, 1)
+
+
+@receiver(post_delete, sender=ProductView)
+def decrease_summary_popularity(sender, instance, **kwargs):
+    ProductSummary.change_popularity(instance.product_id, -1, create_missing=False)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(node_moved, sender=Category)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Size)
+@receiver(post_delete, sender=Size)
+@receiver(post_save, sender=Color)
+@receiver(post_delete, sender=Color)
+@receiver(m2m_changed, sender=Brand.categories.through)
+@receiver(m2m_changed, sender=Size.categories.through)
+def reset_category_tree(sender, **kwargs):
+    invalidate_category_tree()
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(post_save, sender=Brand)
+@receiver(post_delete, sender=Brand)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def update_suggest_indexes(sender, instance, **kwargs):
+    record_change(sender, instance.pk)
@@ -0,0 +1,170 @@
+import time
+from bisect import bisect_left
+from functools import partial
+from heapq import merge
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from namito.catalog.models import Brand, Category, Product
+
+SUGGEST_LIMIT = 5
+
+# Журнал изменений сегмента: счётчик позиций и id изменённого объекта на каждой позиции.
+LOG_KEY = 'catalog:suggest:{segment}:log'
+CHANGE_KEY = 'catalog:suggest:{segment}:{position}'
+CHANGE_TIMEOUT = 24 * 60 * 60
+# При большем отставании от журнала индекс дешевле построить заново.
+MAX_CHANGES = 500
+
+
+def normalize(text):
+    return ' '.join(text.casefold().split())
+
+
+class PrefixIndex:
+    """
+    Отсортированный список ключей для поиска по префиксу через bisect.
+    Для каждого названия индексируются все его окончания с начала слова,
+    так что «рубашка» находит и «Хлопковая рубашка».
+    """
+
+    def __init__(self, items=(), entries=None):
+        if entries is None:
+            entries = self.build_entries(items)
+        self.keys = [entry[0] for entry in entries]
+        self.entries = entries
+
+    @staticmethod
+    def build_entries(items):
+        entries = []
+        for label, payload in items:
+            words = normalize(label).split()
+            entries.extend((' '.join(words[i:]), label, payload) for i in range(len(words)))
+        entries.sort(key=lambda entry: entry[0])
+        return entries
+
+    def replace(self, ids, items):
+        """Новый индекс, в котором записи объектов ids заменены на items."""
+        kept = (entry for entry in self.entries if entry[2]['id'] not in ids)
+        return PrefixIndex(entries=list(merge(kept, self.build_entries(items), key=lambda entry: entry[0])))
+
+    def search(self, prefix, limit=SUGGEST_LIMIT):
+        prefix = normalize(prefix)
+        results = []
+        seen = set()
+        for position in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key, label, payload = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            if payload['id'] in seen:
+                continue
+            seen.add(payload['id'])
+            results.append({**payload, 'name': label})
+            if len(results) == limit:
+                break
+        return results
+
+
+def _translated_names(obj):
+    names = {getattr(obj, f'name_{code}') for code, _name in settings.LANGUAGES}
+    return [name for name in names if name]
+
+
+def _product_items(ids=None):
+    products = Product.objects.filter(active=True)
+    if ids is not None:
+        products = products.filter(pk__in=ids)
+    for product in products.only('pk', *(f'name_{code}' for code, _name in settings.LANGUAGES)):
+        for name in _translated_names(product):
+            yield name, {'id': product.pk}
+
+
+def _brand_items(ids=None):
+    brands = Brand.objects.all()
+    if ids is not None:
+        brands = brands.filter(pk__in=ids)
+    for pk, name in brands.values_list('pk', 'name'):
+        yield name, {'id': pk}
+
+
+def _category_items(ids=None):
+    categories = Category.objects.all()
+    if ids is not None:
+        categories = categories.filter(pk__in=ids)
+    for category in categories.only('pk', 'slug', *(f'name_{code}' for code, _name in settings.LANGUAGES)):
+        for name in _translated_names(category):
+            yield name, {'id': category.pk, 'slug': category.slug}
+
+
+# Индексы держатся в памяти процесса. Изменения объектов пишутся в журнал в
+# кэше, и каждый процесс применяет к своему индексу только записи журнала,
+# которых ещё не видел. Заново индекс строится при старте процесса, при
+# пропусках в журнале и при слишком большом отставании.
+SEGMENTS = {
+    'products': (Product, _product_items),
+    'brands': (Brand, _brand_items),
+    'categories': (Category, _category_items),
+}
+_indexes = {}
+
+
+def _log_change(segment, pk):
+    key = LOG_KEY.format(segment=segment)
+    # Журнал начинается с текущего времени: после потери счётчика позиции не
+    # повторяются, и отставший процесс увидит пропуск, а не чужие записи.
+    cache.add(key, time.time_ns(), None)
+    try:
+        position = cache.incr(key)
+    except ValueError:
+        # Счётчик вытеснили: процессы заметят это по пропуску и перестроят индекс.
+        return
+    cache.set(CHANGE_KEY.format(segment=segment, position=position), pk, CHANGE_TIMEOUT)
+
+
+def record_change(model, pk):
+    """Отмечает изменение объекта для индексов подсказок после коммита транзакции."""
+    for segment, (segment_model, _items) in SEGMENTS.items():
+        if segment_model is model:
+            transaction.on_commit(partial(_log_change, segment, pk))
+
+
+def _get_positions():
+    keys = {name: LOG_KEY.format(segment=name) for name in SEGMENTS}
+    stored = cache.get_many(keys.values())
+    positions = {}
+    for name, key in keys.items():
+        if key not in stored:
+            cache.add(key, time.time_ns(), None)
+            stored[key] = cache.get(key)
+        positions[name] = stored[key]
+    return positions
+
+
+def _refresh(name, items, built, position):
+    behind = position - built[0] if built and built[0] is not None and position is not None else None
+    if behind is not None and 0 < behind <= MAX_CHANGES:
+        keys = [CHANGE_KEY.format(segment=name, position=p) for p in range(built[0] + 1, position + 1)]
+        changes = cache.get_many(keys)
+        if len(changes) == len(keys):
+            ids = set(changes.values())
+            return position, built[1].replace(ids, items(ids))
+    return position, PrefixIndex(items())
+
+
+def get_indexes():
+    # Позиции журнала читаются до запросов к базе: изменения, попавшие в
+    # индекс раньше своей записи, применятся ещё раз без вреда.
+    positions = _get_positions()
+    indexes = {}
+    for name, (_model, items) in SEGMENTS.items():
+        built = _indexes.get(name)
+        if built is None or built[0] != positions[name]:
+            built = _indexes[name] = _refresh(name, items, built, positions[name])
+        indexes[name] = built[1]
+    return indexes
+
+
+def suggest(prefix, limit=SUGGEST_LIMIT):
+    return {name: index.search(prefix, limit) for name, index in get_indexes().items()}
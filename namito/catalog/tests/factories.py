@@ -0,0 +1,118 @@
+from factory import Faker
+from factory import Sequence
+from factory import SubFactory
+from factory import post_generation
+from factory.django import DjangoModelFactory
+from factory.django import ImageField
+
+from namito.catalog.models import Brand
+from namito.catalog.models import Category
+from namito.catalog.models import Characteristic
+from namito.catalog.models import Color
+from namito.catalog.models import Image
+from namito.catalog.models import Product
+from namito.catalog.models import Review
+from namito.catalog.models import Size
+from namito.catalog.models import Tag
+from namito.catalog.models import Variant
+from namito.users.tests.factories import UserFactory
+
+
+class SavingModelFactory(DjangoModelFactory):
+    """Creates instances through save(), which saves more than once for these models."""
+
+    @classmethod
+    def _create(cls, model_class, *args, **kwargs):
+        instance = model_class(*args, **kwargs)
+        instance.save()
+        return instance
+
+
+class CategoryFactory(SavingModelFactory):
+    name = Sequence(lambda n: f"Category {n}")
+
+    class Meta:
+        model = Category
+
+
+class BrandFactory(DjangoModelFactory):
+    name = Sequence(lambda n: f"Brand {n}")
+
+    class Meta:
+        model = Brand
+
+
+class TagFactory(DjangoModelFactory):
+    name = Sequence(lambda n: f"Tag {n}")
+
+    class Meta:
+        model = Tag
+
+
+class ColorFactory(DjangoModelFactory):
+    name = Sequence(lambda n: f"Color {n}")
+    color = Faker("hex_color")
+
+    class Meta:
+        model = Color
+
+
+class SizeFactory(DjangoModelFactory):
+    name = Sequence(lambda n: f"Size {n}")
+
+    class Meta:
+        model = Size
+
+
+class ProductFactory(SavingModelFactory):
+    name = Sequence(lambda n: f"Product {n}")
+    description = Faker("sentence")
+    category = SubFactory(CategoryFactory)
+    brand = SubFactory(BrandFactory)
+
+    class Meta:
+        model = Product
+        skip_postgeneration_save = True
+
+    @post_generation
+    def tags(self, create, extracted, **kwargs):  # noqa: FBT001
+        if create and extracted:
+            self.tags.add(*extracted)
+
+
+class VariantFactory(DjangoModelFactory):
+    product = SubFactory(ProductFactory)
+    color = SubFactory(ColorFactory)
+    size = SubFactory(SizeFactory)
+    price = 1000
+    stock = 10
+
+    class Meta:
+        model = Variant
+
+
+class ImageFactory(DjangoModelFactory):
+    image = ImageField(color="blue")
+    product = SubFactory(ProductFactory)
+    color = SubFactory(ColorFactory)
+
+    class Meta:
+        model = Image
+
+
+class CharacteristicFactory(DjangoModelFactory):
+    key = Faker("word")
+    value = Faker("word")
+    product = SubFactory(ProductFactory)
+
+    class Meta:
+        model = Characteristic
+
+
+class ReviewFactory(DjangoModelFactory):
+    product = SubFactory(ProductFactory)
+    user = SubFactory(UserFactory)
+    rating = 4
+
+    class Meta:
+        model = Review
@@ -0,0 +1,74 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import VariantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def create_listed_product(category, **kwargs):
+    product = ProductFactory(category=category, **kwargs)
+    VariantFactory(product=product, main=True)
+    ImageFactory(product=product)
+    return product
+
+
+@pytest.fixture()
+def tree():
+    root = CategoryFactory(name="Clothes")
+    shirts = CategoryFactory(name="Shirts", parent=root)
+    polo = CategoryFactory(name="Polo", parent=shirts)
+    CategoryFactory(name="Shoes")
+    return root, shirts, polo
+
+
+def test_category_products_include_descendants(tree):
+    root, shirts, polo = tree
+    create_listed_product(root, name="Coat")
+    create_listed_product(polo, name="Polo shirt")
+    ProductFactory(category=shirts, name="No variants")
+    VariantFactory(product=ProductFactory(category=shirts, name="No images"))
+    create_listed_product(CategoryFactory(name="Hats"), name="Cap")
+
+    [category] = APIClient().get(f"/api/category/{root.slug}/").data
+
+    products = category["products"]
+    assert products["count"] == 2  # noqa: PLR2004
+    assert [product["name"] for product in products["products"]] == ["Coat", "Polo shirt"]
+
+
+def test_category_products_are_paginated(tree):
+    root, _, polo = tree
+    for _ in range(25):
+        create_listed_product(polo)
+
+    client = APIClient()
+    [first] = client.get(f"/api/category/{root.slug}/").data
+    [second] = client.get(f"/api/category/{root.slug}/", {"page": 2}).data
+
+    assert first["products"]["count"] == 25  # noqa: PLR2004
+    assert len(first["products"]["products"]) == 20  # noqa: PLR2004
+    assert len(second["products"]["products"]) == 5  # noqa: PLR2004
+
+
+def test_category_products_query_count_does_not_grow(tree):
+    root, shirts, polo = tree
+    client = APIClient()
+    create_listed_product(polo)
+    client.get(f"/api/category/{root.slug}/")  # Собираем кэш дерева категорий
+
+    with CaptureQueriesContext(connection) as small:
+        client.get(f"/api/category/{root.slug}/")
+    for category in (root, shirts, polo):
+        for _ in range(3):
+            create_listed_product(category)
+    client.get(f"/api/category/{root.slug}/")
+    with CaptureQueriesContext(connection) as large:
+        client.get(f"/api/category/{root.slug}/")
+
+    assert len(large) == len(small)
@@ -0,0 +1,88 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.category_tree import get_category_tree
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import SizeFactory
+from namito.pages.models import Contacts
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def tree():
+    root = CategoryFactory(name="Clothes", promotion=True)
+    shirts = CategoryFactory(name="Shirts", parent=root)
+    CategoryFactory(name="Polo", parent=shirts)
+    CategoryFactory(name="Jackets", parent=root)
+    BrandFactory(name="Acme").categories.add(root)
+    SizeFactory(name="XL").categories.add(shirts)
+    ColorFactory(name="Red")
+    return root
+
+
+def test_category_list_returns_nested_tree(tree):
+    response = APIClient().get("/api/categories/")
+
+    [root] = response.data
+    assert root["name"] == "Clothes"
+    assert [child["name"] for child in root["children"]] == ["Jackets", "Shirts"]
+    shirts = root["children"][1]
+    assert shirts["parent"] == {"id": tree.id, "name": "Clothes", "slug": tree.slug}
+    assert [child["name"] for child in shirts["children"]] == ["Polo"]
+    assert [size["name"] for size in shirts["sizes"]] == ["XL"]
+    assert [brand["name"] for brand in shirts["brands"]] == ["Acme"]
+    assert [color["name"] for color in root["colors"]] == ["Red"]
+
+
+def test_category_tree_is_served_from_cache(tree):
+    client = APIClient()
+    with CaptureQueriesContext(connection) as first:
+        client.get("/api/categories/")
+    with CaptureQueriesContext(connection) as second:
+        client.get("/api/categories/promotion/")
+
+    assert len(first) <= 4  # noqa: PLR2004
+    assert len(second) == 0
+
+
+def test_category_tree_is_invalidated_on_changes(tree, django_capture_on_commit_callbacks):
+    client = APIClient()
+    client.get("/api/categories/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        CategoryFactory(name="Boots", parent=tree)
+        SizeFactory(name="M").categories.add(tree)
+
+    [root] = client.get("/api/categories/").data
+    assert [child["name"] for child in root["children"]] == ["Boots", "Jackets", "Shirts"]
+    assert "M" in [size["name"] for size in root["sizes"]]
+
+
+def test_layout_uses_category_tree(tree):
+    Contacts.objects.create()
+
+    response = APIClient().get("/api/layout/")
+
+    assert response.data["promoted_categories"] == [{"name": "Clothes", "slug": tree.slug, "icon": None}]
+    [root] = response.data["categories"]
+    assert set(root) == {"name", "slug", "icon", "children"}
+    assert len(root["children"]) == 2  # noqa: PLR2004
+
+
+def test_category_tree_is_kept_until_commit(tree, django_capture_on_commit_callbacks):
+    cached = get_category_tree()
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        CategoryFactory(name="Boots", parent=tree)
+        with CaptureQueriesContext(connection) as context:
+            assert get_category_tree() == cached
+        assert len(context) == 0
+
+    for callback in callbacks:
+        callback()
+    assert get_category_tree() != cached
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Product
+from namito.catalog.models import ProductSummary
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import VariantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def products():
+    created = []
+    for i in range(45):
+        # Повторяющиеся значения проверяют, что id разрешает равенство ключей.
+        product = ProductFactory(name=f"Product {i % 7}")
+        VariantFactory(product=product, price=100 + i % 5)
+        ImageFactory(product=product)
+        ProductSummary.objects.filter(product=product).update(popularity=i % 3, max_discount=i % 4)
+        created.append(product)
+    return created
+
+
+def walk(client, params):
+    response = client.get("/api/products/", {**params, "pagination": "cursor"})
+    ids = []
+    pages = []
+    while True:
+        assert response.status_code == 200  # noqa: PLR2004
+        pages.append(response.data)
+        ids += [product["id"] for product in response.data["products"]]
+        if not response.data["next"]:
+            return ids, pages
+        response = client.get(response.data["next"])
+
+
+@pytest.mark.parametrize("ordering", [None, "name", "-name", "popularity", "max_discount", "created_at",
+                                      "min_variant_price"])
+def test_cursor_pages_cover_every_product_once(products, ordering):
+    client = APIClient()
+    params = {"ordering": ordering} if ordering else {}
+
+    ids, pages = walk(client, params)
+
+    assert sorted(ids) == sorted(product.pk for product in products)
+    assert len(set(ids)) == len(ids)
+    assert [len(page["products"]) for page in pages] == [20, 20, 5]
+    assert all(page["count"] == 45 and page["total_pages"] == 3 for page in pages)  # noqa: PLR2004
+    if ordering in (None, "name", "-name"):
+        expected = Product.objects.order_by(ordering or "name", "pk").values_list("pk", flat=True)
+        assert ids == list(expected)
+
+
+@pytest.mark.parametrize("ordering", ["name", "-name"])
+@pytest.mark.parametrize("translated", [10, 20])
+def test_untranslated_names_at_page_boundary(products, ordering, translated):
+    # Без перевода name_en пуст, и курсор на границе страницы содержит NULL.
+    Product.objects.update(name_en=None)
+    for i, product in enumerate(products[:translated]):
+        Product.objects.filter(pk=product.pk).update(name_en=f"Item {i % 4}")
+    client = APIClient()
+    client.credentials(HTTP_ACCEPT_LANGUAGE="en")
+
+    ids, pages = walk(client, {"ordering": ordering})
+    previous = client.get(pages[2]["previous"]).data
+
+    name_en = F("name_en").desc(nulls_first=True) if ordering == "-name" else F("name_en").asc(nulls_last=True)
+    assert ids == list(Product.objects.order_by(name_en, "pk").values_list("pk", flat=True))
+    assert previous["products"] == pages[1]["products"]
+
+
+def test_previous_link_returns_the_previous_page(products):
+    client = APIClient()
+    _, pages = walk(client, {"ordering": "popularity"})
+
+    previous = client.get(pages[2]["previous"]).data
+
+    assert [product["id"] for product in previous["products"]] == [
+        product["id"] for product in pages[1]["products"]
+    ]
+    assert pages[0]["previous"] is None
+
+
+def test_count_is_cached_between_pages(products):
+    client = APIClient()
+    first = client.get("/api/products/", {"pagination": "cursor"}).data
+
+    with CaptureQueriesContext(connection) as context:
+        client.get(first["next"])
+
+    assert not any("COUNT(" in query["sql"] for query in context.captured_queries)
+
+
+def test_invalid_cursor_returns_not_found(products):
+    response = APIClient().get("/api/products/", {"cursor": "garbage"})
+
+    assert response.status_code == 404  # noqa: PLR2004
@@ -0,0 +1,97 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Favorite
+from namito.catalog.models import ProductView
+from namito.catalog.personalization import personalize
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import ReviewFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.orders.models import Order
+from namito.orders.models import OrderedItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _no_push(monkeypatch):
+    monkeypatch.setattr("namito.orders.signals.notify_order_status", lambda *args, **kwargs: None)
+
+
+def client_for(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user)
+    return client
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200  # noqa: PLR2004
+    return response.data, [query["sql"] for query in queries.captured_queries]
+
+
+def listed_product():
+    variant = VariantFactory(stock=10)
+    ImageFactory(product=variant.product)
+    return variant
+
+
+def test_users_share_cached_product_list():
+    shirt, socks = listed_product(), listed_product()
+    buyer, fan = UserFactory(), UserFactory()
+    CartItem.objects.create(cart=Cart.objects.create(user=buyer), product_variant=socks, quantity=3)
+    Favorite.objects.create(user=fan, product=shirt.product)
+    get(client_for(), "/api/products/")
+
+    buyer_data, buyer_queries = get(client_for(buyer), "/api/products/")
+    fan_data, _ = get(client_for(fan), "/api/products/")
+    anonymous_data, anonymous_queries = get(client_for(), "/api/products/")
+
+    def fields(data):
+        return {p["id"]: (p["is_favorite"], p["cart_quantity"]) for p in data["products"]}
+
+    assert len(buyer_queries) == 2  # noqa: PLR2004
+    assert anonymous_queries == []
+    assert fields(buyer_data) == {shirt.product_id: (False, 0), socks.product_id: (False, 3)}
+    assert fields(fan_data) == {shirt.product_id: (True, 0), socks.product_id: (False, 0)}
+    assert fields(anonymous_data) == {shirt.product_id: (False, 0), socks.product_id: (False, 0)}
+
+
+def test_product_detail_overlay_covers_reviews_and_records_views():
+    shirt = listed_product()
+    ReviewFactory(product=shirt.product)
+    buyer = UserFactory()
+    order = Order.objects.create(user=buyer, total_amount=100, delivery_method="самовывоз", status=1)
+    OrderedItem.objects.create(order=order, product_variant=shirt)
+    url = f"/api/products/{shirt.product_id}/"
+    anonymous, _ = get(client_for(), url)
+
+    data, queries = get(client_for(buyer), url)
+
+    assert anonymous["review_allowed"] is False
+    assert data["review_allowed"] is True
+    assert [review["review_allowed"] for review in data["reviews"]] == [True]
+    assert data["is_favorite"] is False
+    # Выдача взята из кэша: в базу идут только наложение и запись просмотра.
+    assert not [query for query in queries if 'FROM "catalog_review"' in query]
+    assert ProductView.objects.filter(user=buyer, product=shirt.product).exists()
+
+
+def test_personalize_leaves_shared_payload_untouched():
+    product = ProductFactory()
+    user = UserFactory()
+    Favorite.objects.create(user=user, product=product)
+    shared = {"products": [{"id": product.pk, "is_favorite": False, "cart_quantity": 0}]}
+
+    personal = personalize(shared, user)
+
+    assert personal["products"][0]["is_favorite"] is True
+    assert shared["products"][0]["is_favorite"] is False
@@ -0,0 +1,61 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import SizeFactory
+from namito.catalog.tests.factories import VariantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def create_product(category, brand, variants):
+    product = ProductFactory(category=category, brand=brand)
+    for color, size, price in variants:
+        VariantFactory(product=product, color=color, size=size, price=price)
+    ImageFactory(product=product, color=variants[0][0])
+    return product
+
+
+def test_facets_count_filtered_products():
+    shoes = CategoryFactory(name="Shoes")
+    hats = CategoryFactory(name="Hats")
+    acme, globex = BrandFactory(name="Acme"), BrandFactory(name="Globex")
+    red, blue = ColorFactory(name="Red"), ColorFactory(name="Blue")
+    small, large = SizeFactory(name="S"), SizeFactory(name="L")
+    create_product(shoes, acme, [(red, small, 100), (red, large, 150)])
+    create_product(shoes, acme, [(blue, small, 300)])
+    create_product(shoes, globex, [(red, large, 200)])
+    create_product(hats, globex, [(blue, large, 900)])
+
+    response = APIClient().get("/api/products/", {"category_slug": shoes.slug, "facets": "true"})
+
+    facets = response.data["facets"]
+    assert {brand["name"]: brand["count"] for brand in facets["brands"]} == {"Acme": 2, "Globex": 1}
+    assert {color["name"]: color["count"] for color in facets["colors"]} == {"Red": 2, "Blue": 1}
+    assert {size["name"]: size["count"] for size in facets["sizes"]} == {"S": 2, "L": 2}
+    assert facets["price"] == {"min": 100, "max": 300}
+
+
+def test_facets_are_optional_and_use_bounded_queries(django_capture_on_commit_callbacks):
+    category = CategoryFactory()
+    brand = BrandFactory()
+    client = APIClient()
+
+    assert "facets" not in client.get("/api/products/").data
+
+    create_product(category, brand, [(ColorFactory(), SizeFactory(), 100)])
+    with CaptureQueriesContext(connection) as small:
+        client.get("/api/products/", {"facets": "true"})
+    with django_capture_on_commit_callbacks(execute=True):
+        for _ in range(5):
+            create_product(category, BrandFactory(), [(ColorFactory(), SizeFactory(), 100)])
+    with CaptureQueriesContext(connection) as large:
+        client.get("/api/products/", {"facets": "true"})
+
+    assert len(large) == len(small)
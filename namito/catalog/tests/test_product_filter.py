@@ -0,0 +1,58 @@
+import pytest
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import SizeFactory
+from namito.catalog.tests.factories import VariantFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def catalog():
+    red, blue = ColorFactory(name="Red"), ColorFactory(name="Blue")
+    small, large = SizeFactory(name="S"), SizeFactory(name="L")
+    products = {}
+    for name, variants in {
+        "Red S": [(red, small, 100), (red, small, 120)],
+        "Blue L": [(blue, large, 300)],
+        "Red L and Blue S": [(red, large, 200), (blue, small, 250)],
+    }.items():
+        product = ProductFactory(name=name)
+        for color, size, price in variants:
+            VariantFactory(product=product, color=color, size=size, price=price)
+        ImageFactory(product=product, color=variants[0][0])
+        products[name] = product
+    return red, blue
+
+
+def names(**params):
+    response = APIClient().get("/api/products/", params)
+    assert response.status_code == 200  # noqa: PLR2004
+    return sorted(product["name"] for product in response.data["products"])
+
+
+def test_variant_filters_match_a_single_variant(catalog):
+    red, blue = catalog
+
+    assert names(color=str(red.pk)) == ["Red L and Blue S", "Red S"]
+    assert names(color=str(red.pk), size="S") == ["Red S"]
+    assert names(color=f"{red.pk},{blue.pk}", size="L") == ["Blue L", "Red L and Blue S"]
+    assert names(min_price=150, max_price=220) == ["Red L and Blue S"]
+
+
+def test_color_id_accepts_repeated_params(catalog):
+    red, blue = catalog
+
+    response = APIClient().get(f"/api/products/?color_id={red.pk}&color_id={blue.pk}&size=S")
+
+    assert sorted(product["name"] for product in response.data["products"]) == ["Red L and Blue S", "Red S"]
+
+
+def test_variant_filters_do_not_duplicate_products(catalog):
+    response = APIClient().get("/api/products/", {"size": "S,L", "min_price": 1})
+
+    assert response.data["count"] == 3  # noqa: PLR2004
+    assert len(response.data["products"]) == 3  # noqa: PLR2004
@@ -0,0 +1,95 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Favorite
+from namito.catalog.tests.factories import CharacteristicFactory
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import ReviewFactory
+from namito.catalog.tests.factories import SizeFactory
+from namito.catalog.tests.factories import TagFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+PRODUCT_LIST_URLS = [
+    "/api/products/",
+    "/api/top-products/",
+    "/api/new-products/",
+    "/api/discounts/",
+    "/api/favorites/",
+]
+
+
+@pytest.fixture()
+def api_client(user: User) -> APIClient:
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def create_listed_products(count: int, user: User) -> None:
+    cart, _ = Cart.objects.get_or_create(user=user)
+    color = ColorFactory()
+    size = SizeFactory()
+    tags = TagFactory.create_batch(2)
+    for _ in range(count):
+        product = ProductFactory(is_top=True, is_new=True, tags=tags)
+        main = VariantFactory(product=product, color=color, size=size, main=True)
+        VariantFactory(
+            product=product,
+            color=color,
+            size=size,
+            discount_value=10,
+            discount_type="percent",
+        )
+        ImageFactory.create_batch(2, product=product, color=color)
+        CharacteristicFactory.create_batch(2, product=product)
+        ReviewFactory(product=product)
+        Favorite.objects.create(user=user, product=product)
+        CartItem.objects.create(cart=cart, product_variant=main, quantity=2)
+
+
+def count_queries(client: APIClient, url: str) -> tuple[int, list]:
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200  # noqa: PLR2004
+    data = response.data
+    if isinstance(data, dict):
+        data = data["products"]
+    return len(context), data
+
+
+@pytest.mark.parametrize("url", PRODUCT_LIST_URLS)
+def test_product_list_query_count_does_not_grow_with_page(url, user, api_client, django_capture_on_commit_callbacks):
+    create_listed_products(2, user)
+    small_count, small_data = count_queries(api_client, url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        create_listed_products(8, user)
+    large_count, large_data = count_queries(api_client, url)
+
+    assert len(small_data) == 2  # noqa: PLR2004
+    assert len(large_data) == 10  # noqa: PLR2004
+    assert large_count == small_count
+    assert large_count <= 10  # noqa: PLR2004
+
+
+def test_product_list_uses_prefetched_values(user, api_client):
+    create_listed_products(1, user)
+
+    _, data = count_queries(api_client, "/api/products/")
+
+    product = data[0]
+    assert product["is_favorite"] is True
+    assert product["cart_quantity"] == 2  # noqa: PLR2004
+    assert product["average_rating"] == 4  # noqa: PLR2004
+    assert product["price"]["price"] == 1000  # noqa: PLR2004
+    assert len(product["images"]) == 2  # noqa: PLR2004
+    assert len(product["variants"]) == 2  # noqa: PLR2004
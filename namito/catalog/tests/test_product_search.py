@@ -0,0 +1,52 @@
+import pytest
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import VariantFactory
+
+pytestmark = pytest.mark.django_db
+
+SEARCH_URL = "/api/products/search/"
+
+
+def create_listed_product(**kwargs):
+    product = ProductFactory(**kwargs)
+    VariantFactory(product=product)
+    ImageFactory(product=product)
+    return product
+
+
+def search(**params):
+    response = APIClient().get(SEARCH_URL, params, HTTP_ACCEPT_LANGUAGE="en")
+    assert response.status_code == 200  # noqa: PLR2004
+    return [product["name"] for product in response.data["products"]]
+
+
+def test_search_ranks_name_matches_first():
+    create_listed_product(name_en="Cotton shirt", description_en="Soft and light")
+    create_listed_product(name_en="Linen trousers", description_en="Goes well with a shirt")
+    create_listed_product(name_en="Leather boots", description_en="Waterproof")
+
+    assert search(name="shirt") == ["Cotton shirt", "Linen trousers"]
+
+
+def test_search_tolerates_typos():
+    create_listed_product(name_en="Sneakers", description_en="Running shoes")
+
+    assert search(name="snaekers") == ["Sneakers"]
+
+
+def test_search_by_brand_and_images():
+    acme = BrandFactory(name="Acme")
+    create_listed_product(name_en="Jacket", brand=acme)
+    VariantFactory(product=ProductFactory(name_en="Hidden jacket", brand=acme))
+
+    assert search(brand="acme") == ["Jacket"]
+
+
+def test_search_without_params_returns_nothing():
+    create_listed_product(name_en="Jacket")
+
+    assert search() == []
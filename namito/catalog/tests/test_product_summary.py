@@ -0,0 +1,86 @@
+from decimal import Decimal
+
+import pytest
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Product
+from namito.catalog.models import ProductSummary
+from namito.catalog.models import ProductView
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import ReviewFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_summary_follows_variants():
+    product = ProductFactory()
+    VariantFactory(product=product, price=500)
+    main = VariantFactory(product=product, price=800, main=True, discount_value=25, discount_type="percent")
+
+    summary = ProductSummary.objects.get(product=product)
+    assert summary.price == Decimal(800)
+    assert summary.discounted_price == Decimal(600)
+    assert summary.min_price == Decimal(500)
+    assert summary.max_discount == Decimal(25)
+    assert summary.has_discount is True
+    assert Product.objects.get(pk=product.pk).min_price == 500  # noqa: PLR2004
+
+    main.delete()
+
+    summary.refresh_from_db()
+    assert summary.price == Decimal(500)
+    assert summary.discounted_price is None
+    assert summary.has_discount is False
+
+
+def test_summary_follows_reviews_images_and_views():
+    product = ProductFactory()
+    first = ReviewFactory(product=product, rating=5)
+    ReviewFactory(product=product, rating=2)
+    ImageFactory(product=product)
+    ProductView.objects.create(product=product, user=UserFactory())
+
+    summary = ProductSummary.objects.get(product=product)
+    assert summary.average_rating == 3.5  # noqa: PLR2004
+    assert summary.review_count == 2  # noqa: PLR2004
+    assert summary.has_images is True
+    assert summary.popularity == 1
+
+    first.delete()
+    ProductView.objects.all().delete()
+
+    summary.refresh_from_db()
+    assert summary.average_rating == 2  # noqa: PLR2004
+    assert summary.review_count == 1
+    assert summary.popularity == 0
+
+
+def test_summary_is_removed_with_product():
+    variant = VariantFactory()
+    ReviewFactory(product=variant.product)
+
+    variant.product.delete()
+
+    assert not ProductSummary.objects.exists()
+
+
+def test_rebuild_restores_missing_summaries():
+    variant = VariantFactory(price=300)
+    ProductSummary.objects.all().delete()
+
+    assert ProductSummary.rebuild() == 1
+    assert ProductSummary.objects.get(product=variant.product).price == Decimal(300)
+
+
+def test_product_list_orders_by_summary_price():
+    for price in (300, 100, 200):
+        variant = VariantFactory(price=price)
+        ImageFactory(product=variant.product)
+
+    response = APIClient().get("/api/products/", {"ordering": "min_variant_price"})
+
+    prices = [product["price"]["price"] for product in response.data["products"]]
+    assert prices == [100, 200, 300]
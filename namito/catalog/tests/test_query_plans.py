@@ -0,0 +1,68 @@
+import pytest
+from django.db.models import Exists
+from django.db.models import OuterRef
+
+from namito.catalog.models import Image
+from namito.catalog.models import Product
+from namito.catalog.models import Variant
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import SizeFactory
+
+pytestmark = pytest.mark.django_db
+
+PRODUCTS = 2000
+
+
+@pytest.fixture()
+def catalog():
+    category, brand = CategoryFactory(), BrandFactory()
+    color, size = ColorFactory(), SizeFactory()
+    products = Product.objects.bulk_create(
+        Product(name=f"Product {i}", description="", category=category, brand=brand,
+                is_top=i % 100 == 0, is_new=i % 50 == 0, active=i % 10 != 0)
+        for i in range(PRODUCTS)
+    )
+    Variant.objects.bulk_create(
+        Variant(product=product, color=color, size=size, price=100 + i % 5000 + j, main=j == 0,
+                discount_value=10 if i % 40 == 0 else None, discount_type="percent")
+        for i, product in enumerate(products) for j in range(3)
+    )
+    Image.objects.bulk_create(
+        Image(product=product, color=color, image="product_images/image.webp", main_image=j == 0)
+        for product in products for j in range(2)
+    )
+    return products
+
+
+def assert_uses_index(plan, index):
+    assert "Seq Scan" not in plan, plan
+    assert index in plan, plan
+
+
+def test_newest_products_use_partial_index(catalog, query_plan):
+    plan = query_plan(Product.objects.filter(active=True).order_by("-created_at")[:20])
+    assert_uses_index(plan, "product_active_created")
+
+
+def test_top_and_new_products_use_partial_indexes(catalog, query_plan):
+    assert_uses_index(query_plan(Product.objects.filter(is_top=True).values("pk")), "product_top")
+    assert_uses_index(query_plan(Product.objects.filter(is_new=True).order_by("-id")[:15]), "product_new")
+
+
+def test_price_filter_uses_variant_price_index(catalog, query_plan):
+    variants = Variant.objects.filter(product=OuterRef("pk"), price__gte=1000, price__lte=1100)
+    plan = query_plan(Product.objects.filter(Exists(variants)))
+    assert_uses_index(plan, "variant_price_product")
+
+
+def test_discounted_products_use_partial_index(catalog, query_plan):
+    variants = Variant.objects.filter(product=OuterRef("pk"), discount_value__isnull=False,
+                                      discount_type__isnull=False)
+    assert_uses_index(query_plan(Product.objects.filter(Exists(variants))), "variant_discounted")
+
+
+def test_main_image_uses_partial_index(catalog, query_plan):
+    plan = query_plan(catalog[1].images.filter(main_image=True)[:1])
+    assert_uses_index(plan, "image_product_main")
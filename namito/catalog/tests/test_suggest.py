@@ -0,0 +1,108 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Product
+from namito.catalog.suggest import CHANGE_KEY
+from namito.catalog.suggest import LOG_KEY
+from namito.catalog.suggest import PrefixIndex
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ProductFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def suggest(query):
+    response = APIClient().get("/api/suggest/", {"q": query})
+    assert response.status_code == 200  # noqa: PLR2004
+    return response.data
+
+
+def test_prefix_index_matches_word_starts():
+    index = PrefixIndex([("Cotton shirt", {"id": 1}), ("Shirt dress", {"id": 2}), ("Shoes", {"id": 3})])
+
+    assert [item["id"] for item in index.search("SHIR")] == [1, 2]
+    assert index.search("cotton s") == [{"id": 1, "name": "Cotton shirt"}]
+    assert index.search("hirt") == []
+
+
+def test_suggest_returns_names_in_both_languages():
+    category = CategoryFactory(name_en="Shirts", name_ru="Рубашки")
+    product = ProductFactory(name_en="Cotton shirt", name_ru="Хлопковая рубашка", category=category)
+    BrandFactory(name="Shiro")
+
+    data = suggest("shir")
+    assert data["products"] == [{"id": product.pk, "name": "Cotton shirt"}]
+    assert [brand["name"] for brand in data["brands"]] == ["Shiro"]
+    assert data["categories"] == [{"id": category.pk, "slug": category.slug, "name": "Shirts"}]
+
+    assert suggest("руб")["products"] == [{"id": product.pk, "name": "Хлопковая рубашка"}]
+
+
+def test_suggest_does_not_query_database_once_built():
+    ProductFactory(name_en="Boots")
+    suggest("bo")
+
+    with CaptureQueriesContext(connection) as context:
+        suggest("boo")
+
+    assert len(context) == 0
+
+
+def test_prefix_index_replaces_entries_of_changed_objects():
+    index = PrefixIndex([("Cotton shirt", {"id": 1}), ("Shoes", {"id": 2})])
+
+    index = index.replace({1, 3}, [("Silk shirt", {"id": 1}), ("Shorts", {"id": 3})])
+
+    assert [item["name"] for item in index.search("sh", limit=10)] == ["Silk shirt", "Shoes", "Shorts"]
+    assert index.search("cotton") == []
+
+
+def test_suggest_index_follows_catalog_changes(django_capture_on_commit_callbacks):
+    product = ProductFactory(name_en="Boots")
+    suggest("bo")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.name_en = "Sandals"
+        product.save()
+
+    assert suggest("bo")["products"] == []
+    assert [item["name"] for item in suggest("sa")["products"]] == ["Sandals"]
+
+
+def test_suggest_index_applies_changes_without_rebuilding(django_capture_on_commit_callbacks):
+    boots, sandals = ProductFactory(name_en="Boots"), ProductFactory(name_en="Sandals")
+    ProductFactory(name_en="Boat shoes")
+    suggest("bo")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        boots.name_en = "Bootees"
+        boots.save()
+        sandals.delete()
+        brand = BrandFactory(name="Bold")
+    with CaptureQueriesContext(connection) as context:
+        data = suggest("bo")
+
+    # Перечитываются только изменённые продукты и бренды, категории не трогаются.
+    assert len(context) == 2  # noqa: PLR2004
+    assert all("IN (" in query["sql"] for query in context.captured_queries)
+    assert sorted(item["name"] for item in data["products"]) == ["Boat shoes", "Bootees"]
+    assert data["brands"] == [{"id": brand.pk, "name": "Bold"}]
+    assert suggest("sa")["products"] == []
+
+
+def test_suggest_index_is_rebuilt_after_a_gap_in_the_log(django_capture_on_commit_callbacks):
+    product = ProductFactory(name_en="Boots")
+    suggest("bo")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product.name_en = "Sandals"
+        product.save()
+    position = cache.get(LOG_KEY.format(segment="products"))
+    cache.delete(CHANGE_KEY.format(segment="products", position=position))
+    Product.objects.filter(pk=product.pk).update(name_en="Loafers")
+
+    assert [item["name"] for item in suggest("lo")["products"]] == ["Loafers"]
@@ -0,0 +1,54 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from namito.catalog.models import Product
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.catalog.top_products import get_top_product_ids
+from namito.catalog.top_products import sample_top_products
+
+pytestmark = pytest.mark.django_db
+
+
+def create_top_product(stock=10, is_top=True):
+    product = ProductFactory(is_top=is_top)
+    VariantFactory(product=product, stock=stock)
+    ImageFactory(product=product)
+    return product
+
+
+def test_pool_contains_only_eligible_products():
+    top = create_top_product()
+    out_of_stock = create_top_product(stock=0)
+    without_images = ProductFactory(is_top=True)
+    VariantFactory(product=without_images)
+    regular = create_top_product(is_top=False)
+
+    assert set(get_top_product_ids()) == {top.pk, out_of_stock.pk}
+    assert set(get_top_product_ids(in_stock=True)) == {top.pk}
+    assert regular.pk not in get_top_product_ids()
+
+
+def test_pool_is_cached_and_refreshed_on_changes(django_capture_on_commit_callbacks):
+    create_top_product()
+    get_top_product_ids()
+
+    with CaptureQueriesContext(connection) as context:
+        get_top_product_ids()
+    assert len(context) == 0
+
+    with django_capture_on_commit_callbacks(execute=True):
+        product = create_top_product()
+    assert product.pk in get_top_product_ids()
+
+
+def test_sample_is_bounded_and_random():
+    products = [create_top_product() for _ in range(20)]
+
+    samples = [[product.pk for product in sample_top_products(Product.objects.all(), 5)] for _ in range(10)]
+
+    assert all(len(sample) == 5 for sample in samples)  # noqa: PLR2004
+    assert all(set(sample) <= {product.pk for product in products} for sample in samples)
+    assert len({tuple(sample) for sample in samples}) > 1
@@ -0,0 +1,39 @@
+import random
+
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef
+
+from namito.catalog.models import Image, Product, Variant
+from namito.pages.cache import get_model_versions
+
+POOL_KEY = 'catalog:top-products:{kind}:{versions}'
+POOL_TIMEOUT = 60 * 60
+
+
+def get_top_product_ids(in_stock=False):
+    """
+    Id всех топ-продуктов с изображениями, из кэша. Ключ включает версии
+    продуктов, вариантов и изображений, так что пул обновляется при их изменении.
+    """
+    versions = get_model_versions((Product, Variant, Image))
+    key = POOL_KEY.format(kind='in-stock' if in_stock else 'all',
+                          versions='-'.join(str(versions[label]) for label in sorted(versions)))
+    ids = cache.get(key)
+    if ids is None:
+        products = Product.objects.filter(is_top=True, summary__has_images=True)
+        if in_stock:
+            products = products.filter(Exists(Variant.objects.filter(product=OuterRef('pk'), stock__gt=0)))
+        ids = list(products.values_list('pk', flat=True))
+        cache.set(key, ids, POOL_TIMEOUT)
+    return ids
+
+
+def sample_top_products(queryset, count, in_stock=False):
+    """
+    Случайные count топ-продуктов из queryset. Выборка делается в Python по
+    пулу id, поэтому база не сортирует все топ-продукты через ORDER BY RANDOM().
+    """
+    ids = get_top_product_ids(in_stock)
+    ids = random.sample(ids, min(count, len(ids)))
+    products = {product.pk: product for product in queryset.filter(pk__in=ids)}
+    return [products[pk] for pk in ids if pk in products]
@@ -26,6 +26,7 @@ from namito.catalog.api.views import (
     CategoryBySlugAPIView,
     CategoryByNameStartsWithAPIView,
     ProductSearchByNameAndBrandAPIView,
+    SuggestAPIView,
     ColorSizeBrandAPIView,
     ProductReviewListView,
     SimilarProductsView,
@@ -49,6 +50,7 @@ product_patterns = [
     path('new-products/', NewProductListView.as_view()),
     path('products/<int:pk>/', ProductDetailView.as_view()),
     path('products/search/', ProductSearchByNameAndBrandAPIView.as_view(), name='product_startswith'),
+    path('suggest/', SuggestAPIView.as_view(), name='suggest'),
     path('products/<int:pk>/reviews/', ProductReviewListView.as_view(), name='product-reviews'),
     path('products/<int:product_id>/similar/', SimilarProductsView.as_view(), name='similar-products'),
 ]
@@ -1,4 +1,6 @@
 import pytest
+from django.core.cache import cache
+from django.db import connection
 
 from namito.users.models import User
 from namito.users.tests.factories import UserFactory
@@ -9,6 +11,28 @@ def _media_storage(settings, tmpdir) -> None:
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def _clear_cache() -> None:
+    cache.clear()
+
+
 @pytest.fixture()
 def user(db) -> User:
     return UserFactory()
+
+
+@pytest.fixture()
+def query_plan(db):
+    """
+    План запроса на заполненных тестом данных. Последовательное сканирование
+    выключено до конца теста, поэтому Seq Scan в плане значит, что у запроса
+    нет подходящего индекса.
+    """
+
+    def explain(queryset):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    return explain
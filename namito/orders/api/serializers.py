@@ -1,5 +1,5 @@
 from namito.catalog.api.serializers import VariantSerializer
-from namito.catalog.models import Image
+from namito.catalog.models import Image, Variant
 from namito.orders.models import (
     Cart,
     CartItem,
@@ -7,6 +7,9 @@ from namito.orders.models import (
     OrderHistory,
     OrderedItem
     )
+from namito.orders.cart import get_cart
+from namito.orders.stock import OutOfStockError, reserve_stock
+from namito.pages.cache import bump_model_version
 from namito.users.models import UserAddress
 from namito.users.api.serializers import UserAddressDetailSerializer
 
@@ -14,6 +17,7 @@ from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
 
 from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 
 
 class CartItemCreateUpdateSerializer(serializers.ModelSerializer):
@@ -27,6 +31,36 @@ class CartItemCreateUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
+def items_prefetch(lookup, model):
+    """
+    Позиции корзины или заказа вместе с вариантами, продуктами, цветами,
+    размерами и главной картинкой продукта - три запроса на любое число позиций.
+    """
+    return (
+        Prefetch(lookup, queryset=model.objects.select_related(
+            'product_variant__product', 'product_variant__color', 'product_variant__size')),
+        # DISTINCT ON оставляет одну картинку на продукт: главную, а без неё - первую по id.
+        Prefetch(f'{lookup}__product_variant__product__images',
+                 queryset=Image.objects.order_by('product_id', '-main_image', 'id').distinct('product_id'),
+                 to_attr='main_images'),
+    )
+
+
+def _main_image_url(product, request):
+    # Главная картинка из items_prefetch, а без prefetch - отдельным запросом.
+    if hasattr(product, 'main_images'):
+        image = product.main_images[0] if product.main_images else None
+    else:
+        image = product.images.order_by('-main_image', 'id').first()
+    if image and request:
+        return request.build_absolute_uri(image.image.url)
+    return None
+
+
+CART_ITEMS_PREFETCH = items_prefetch('items', CartItem)
+ORDERED_ITEMS_PREFETCH = items_prefetch('ordered_items', OrderedItem)
+
+
 class CartItemSerializer(serializers.ModelSerializer):
     product_variant = VariantSerializer(required=False)
     product_name = serializers.CharField(source='product_variant.product.name', read_only=True)
@@ -37,22 +71,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product_variant', 'quantity', 'to_purchase', 'product_name', 'product_image']
 
     def get_product_image(self, obj):
-        variant = obj.product_variant
-        product = variant.product
-
-        main_image = product.images.filter(main_image=True).first()
-        if main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(main_image.image.url)
-
-        first_image = product.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-
-        return None
+        return _main_image_url(obj.product_variant.product, self.context.get('request'))
 
 
 class CartSerializer(ModelSerializer):
@@ -85,22 +104,7 @@ class OrderedItemSerializer(ModelSerializer):
         fields = ['id', 'product_variant', 'quantity', 'product_name', 'product_id', 'product_image']
 
     def get_product_image(self, obj):
-        variant = obj.product_variant
-        product = variant.product
-
-        main_image = product.images.filter(main_image=True).first()
-        if main_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(main_image.image.url)
-
-        first_image = product.images.first()
-        if first_image:
-            request = self.context.get('request')
-            if request:
-                return request.build_absolute_uri(first_image.image.url)
-
-        return None
+        return _main_image_url(obj.product_variant.product, self.context.get('request'))
 
 
 class OrderSerializer(serializers.ModelSerializer):
@@ -132,10 +136,11 @@ class OrderSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         user = self.context['request'].user
-        cart = Cart.objects.get(user=user)
+        cart = get_cart(user)
 
-        items_to_purchase = cart.items.filter(to_purchase=True)
-        if not items_to_purchase.exists():
+        # Все позиции вместе с вариантами одним запросом, число запросов не зависит от размера корзины.
+        items_to_purchase = list(cart.items.filter(to_purchase=True).select_related('product_variant'))
+        if not items_to_purchase:
             raise serializers.ValidationError("В корзине нет товаров для покупки.")
 
         delivery_method = validated_data.get('delivery_method', 'курьером')
@@ -145,33 +150,34 @@ class OrderSerializer(serializers.ModelSerializer):
         if delivery_method == 'курьером' and not user_address:
             raise serializers.ValidationError("Для доставки курьером требуется указать адрес доставки.")
 
-        total_amount = 0
+        total_amount = sum(item.product_variant.get_price() * item.quantity for item in items_to_purchase)
 
         with transaction.atomic():
             order = Order.objects.create(
                 user=user,
                 cart=cart,
-                total_amount=0,
+                total_amount=total_amount,
                 delivery_method=delivery_method,
                 user_address=user_address,
                 payment_method=payment_method
             )
 
-            for item in items_to_purchase:
-                price = item.product_variant.get_price()
-                total_amount += price * item.quantity
-
-                OrderedItem.objects.create(
-                    order=order,
-                    product_variant=item.product_variant,
-                    quantity=item.quantity
-                )
+            OrderedItem.objects.bulk_create(
+                OrderedItem(order=order, product_variant=item.product_variant, quantity=item.quantity)
+                for item in items_to_purchase
+            )
+            # bulk_create не шлёт post_save, версию для ETag страницы продукта обновляем сами.
+            bump_model_version(OrderedItem)
 
-            order.total_amount = total_amount
-            order.save()
+            try:
+                reserve_stock(order)
+            except OutOfStockError as error:
+                raise serializers.ValidationError({'detail': "Недостаточно товара на складе.",
+                                                   'product_variants': error.variant_ids})
 
-            items_to_purchase.delete()
+            CartItem.objects.filter(pk__in=[item.pk for item in items_to_purchase]).delete()
 
+        prefetch_related_objects([order], *ORDERED_ITEMS_PREFETCH)
         return order
 
     def update(self, instance, validated_data):
@@ -199,18 +205,44 @@ class OrderListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'order_number', 'created_at', 'status', 'total_amount']
 
 
+def variant_error(variant):
+    """Причина, по которой вариант нельзя положить в корзину, или None."""
+    if variant is None:
+        return "Product variant does not exist."
+    if variant.stock is not None and variant.stock <= 0:
+        return "Product variant is out of stock."
+    return None
+
+
+class MultiCartItemAddListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        items = super().to_internal_value(data)
+
+        # Все варианты одним запросом вместо запроса на каждую позицию.
+        variants = Variant.objects.in_bulk({item['product_variant'] for item in items})
+        errors = []
+        for item in items:
+            error = variant_error(variants.get(item['product_variant']))
+            errors.append({'product_variant': [error]} if error else {})
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+
 class MultiCartItemAddSerializer(serializers.Serializer):
     product_variant = serializers.IntegerField()
     quantity = serializers.IntegerField(min_value=1)
 
-    def validate_product_variant(self, value):
-        from namito.catalog.models import Variant
-        try:
-            variant = Variant.objects.get(pk=value)
-        except Variant.DoesNotExist:
-            raise serializers.ValidationError("Product variant does not exist.")
-
-        if variant.stock <= 0:
-            raise serializers.ValidationError("Product variant is out of stock.")
-
-        return value
+    class Meta:
+        list_serializer_class = MultiCartItemAddListSerializer
+
+
+class MultiCartItemUpdateSerializer(serializers.Serializer):
+    """
+    Поля одной позиции массового обновления. Вариант проверяется во view
+    вместе с остальными, чтобы не ходить в базу на каждую позицию.
+    """
+    id = serializers.IntegerField()
+    product_variant = serializers.IntegerField(required=False)
+    quantity = serializers.IntegerField(min_value=0, required=False)
+    to_purchase = serializers.BooleanField(required=False)
@@ -1,3 +1,6 @@
+from collections import defaultdict
+
+from django.db.models import prefetch_related_objects
 from rest_framework import status, permissions, generics
 from rest_framework.response import Response
 from rest_framework.views import APIView
@@ -9,14 +12,21 @@ from namito.orders.api.serializers import (
     CartItemSerializer,
     CartItemCreateUpdateSerializer,
     OrderListSerializer,
-    MultiCartItemAddSerializer
+    MultiCartItemAddSerializer,
+    MultiCartItemUpdateSerializer,
+    CART_ITEMS_PREFETCH,
+    ORDERED_ITEMS_PREFETCH,
+    variant_error
     )
+from namito.catalog.models import Variant
+from namito.orders.cart import add_to_cart, get_cart
 from namito.orders.models import (
     Cart,
     CartItem,
     Order,
     OrderHistory
 )
+from namito.pages.cache import bump_model_version
 
 
 class CartItemCreateAPIView(generics.CreateAPIView):
@@ -25,20 +35,13 @@ class CartItemCreateAPIView(generics.CreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def perform_create(self, serializer):
-        user = self.request.user
-        cart, created = Cart.objects.get_or_create(user=user)
-        variant_id = self.request.data.get('product_variant')
-
-        # Check if the CartItem with the same product_variant already exists in the cart
-        cart_item = CartItem.objects.filter(cart=cart, product_variant_id=variant_id).first()
+        cart = get_cart(self.request.user)
+        variant = serializer.validated_data['product_variant']
+        quantity = serializer.validated_data.get('quantity', 1)
+        to_purchase = serializer.validated_data.get('to_purchase', True)
 
-        if cart_item:
-            # If it exists, increase the quantity
-            cart_item.quantity += self.request.data.get('quantity', 1)
-            cart_item.save()
-        else:
-            # If it does not exist, create a new CartItem
-            serializer.save(cart=cart, product_variant_id=variant_id)
+        # Если вариант уже в корзине, количество увеличивается тем же запросом.
+        serializer.instance, = add_to_cart(cart, {variant.pk: quantity}, to_purchase)
 
 
 class CartItemDeleteAPIView(generics.RetrieveDestroyAPIView):
@@ -60,14 +63,15 @@ class CartDetailAPIView(generics.RetrieveAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        user = self.request.user
-        cart, created = Cart.objects.get_or_create(user=user)
+        cart = get_cart(self.request.user)
+        prefetch_related_objects([cart], *CART_ITEMS_PREFETCH)
         return cart
 
     def get(self, request, *args, **kwargs):
         cart = self.get_object()
-        if cart.items.exists():
-            return super().get(request, *args, **kwargs)
+        # Позиции уже загружены prefetch'ем, отдельный exists() не нужен.
+        if cart.items.all():
+            return Response(self.get_serializer(cart).data)
         else:
             if self.request.LANGUAGE_CODE == 'ru':
                 return Response({"detail": "Карзина пуста"}, status=status.HTTP_200_OK)
@@ -80,8 +84,7 @@ class MultiCartItemUpdateAPIView(generics.GenericAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def put(self, request, *args, **kwargs):
-        user = request.user
-        cart = Cart.objects.get(user=user)
+        cart = get_cart(request.user)
 
         # Проверьте, является ли request.data словарем
         if not isinstance(request.data, dict):
@@ -99,31 +102,58 @@ class MultiCartItemUpdateAPIView(generics.GenericAPIView):
         # Словарь для хранения результата обновления
         results = {"updated_items": [], "errors": []}
 
-        for item_data in items_data:
-            # Получаем id элемента
-            item_id = item_data.get('id')
-
-            try:
-                # Получаем элемент корзины
-                cart_item = CartItem.objects.get(id=item_id, cart=cart)
-
-                # Обновляем элемент
-                serializer = self.serializer_class(cart_item, data=item_data, partial=True)
-
-                if serializer.is_valid():
-                    serializer.save()
-                    results["updated_items"].append(serializer.data)
-                else:
-                    results["errors"].append({
-                        "id": item_id,
-                        "errors": serializer.errors
-                    })
+        # Сначала проверяются поля всех позиций, затем позиции, варианты и
+        # занятые варианты корзины читаются тремя запросами на весь список.
+        item_serializers = [MultiCartItemUpdateSerializer(data=item_data) for item_data in items_data]
+        valid_data = [serializer.validated_data for serializer in item_serializers if serializer.is_valid()]
+        cart_items = cart.items.in_bulk([data['id'] for data in valid_data])
+        variants = Variant.objects.in_bulk({data['product_variant'] for data in valid_data
+                                            if 'product_variant' in data})
+        # Позицию можно перевести только на вариант, которого ещё нет в корзине
+        # и который не занят раньше в этом же запросе, иначе UPDATE упрётся
+        # в уникальность (cart, product_variant).
+        occupied = dict(cart.items.filter(order__isnull=True, product_variant_id__in=variants)
+                        .values_list('product_variant_id', 'id'))
+
+        changed = {}
+        for item_data, serializer in zip(items_data, item_serializers):
+            if serializer.errors:
+                results["errors"].append({
+                    "id": item_data.get('id') if isinstance(item_data, dict) else None,
+                    "errors": serializer.errors
+                })
+                continue
 
-            except CartItem.DoesNotExist:
+            data = serializer.validated_data
+            cart_item = cart_items.get(data['id'])
+            if cart_item is None:
                 results["errors"].append({
-                    "id": item_id,
-                    "errors": "CartItem with id {} does not exist.".format(item_id)
+                    "id": data['id'],
+                    "errors": "CartItem with id {} does not exist.".format(data['id'])
                 })
+                continue
+
+            if 'product_variant' in data:
+                variant = variants.get(data['product_variant'])
+                error = variant_error(variant)
+                if not error and occupied.get(variant.pk, cart_item.pk) != cart_item.pk:
+                    error = "Product variant is already in the cart."
+                if error:
+                    results["errors"].append({"id": data['id'], "errors": {"product_variant": [error]}})
+                    continue
+                occupied[variant.pk] = cart_item.pk
+                cart_item.product_variant = variant
+            for field in ('quantity', 'to_purchase'):
+                if field in data:
+                    setattr(cart_item, field, data[field])
+
+            changed[cart_item.pk] = cart_item
+            results["updated_items"].append(self.serializer_class(cart_item).data)
+
+        if changed:
+            CartItem.objects.bulk_update(changed.values(), ['product_variant', 'quantity', 'to_purchase'])
+            # bulk_update не шлёт post_save, версию для ETag страницы продукта обновляем сами.
+            bump_model_version(CartItem)
 
         return Response(results, status=status.HTTP_200_OK)
 
@@ -146,7 +176,7 @@ class OrderDetailAPIView(generics.RetrieveUpdateAPIView):
 
     def get_queryset(self):
         if self.request.user.is_authenticated:
-            return Order.objects.filter(user=self.request.user)
+            return Order.objects.filter(user=self.request.user).prefetch_related(*ORDERED_ITEMS_PREFETCH)
         else:
             return Order.objects.none()
 
@@ -202,8 +232,7 @@ class MultiCartItemAddAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user = request.user
-        cart, created = Cart.objects.get_or_create(user=user)
+        cart = get_cart(request.user)
 
         items_data = request.data.get('items', [])
 
@@ -211,18 +240,13 @@ class MultiCartItemAddAPIView(APIView):
         serializer = MultiCartItemAddSerializer(data=items_data, many=True)
         serializer.is_valid(raise_exception=True)
 
+        # Повторы одного варианта в запросе складываются в одну позицию.
+        quantities = defaultdict(int)
         for item_data in serializer.validated_data:
-            variant_id = item_data['product_variant']
-            quantity = item_data['quantity']
-
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product_variant_id=variant_id,
-                defaults={'quantity': quantity}
-            )
-            if not created:
-                cart_item.quantity += quantity
-                cart_item.save()
+            quantities[item_data['product_variant']] += item_data['quantity']
+
+        add_to_cart(cart, quantities)
+        prefetch_related_objects([cart], *CART_ITEMS_PREFETCH)
 
         # Serialize the updated cart
         cart_serializer = CartSerializer(cart, context={'request': request})
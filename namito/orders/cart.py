@@ -0,0 +1,60 @@
+from functools import partial
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+from namito.orders.models import Cart, CartItem
+from namito.pages.cache import bump_model_version
+
+CART_KEY = 'orders:cart:{user_id}'
+CART_TIMEOUT = 24 * 60 * 60
+
+UPSERT_SQL = '''
+    INSERT INTO {table} (cart_id, product_variant_id, quantity, to_purchase)
+    SELECT %s, variant_id, quantity, %s FROM unnest(%s::bigint[], %s::integer[]) AS added(variant_id, quantity)
+    ON CONFLICT (cart_id, product_variant_id) WHERE order_id IS NULL
+    DO UPDATE SET quantity = {table}.quantity + EXCLUDED.quantity
+    RETURNING id, product_variant_id, quantity, to_purchase
+'''
+
+
+def get_cart(user):
+    """
+    Корзина пользователя. Id и дата создания корзины берутся из кэша, в базу
+    запрос идёт только при промахе. Корзина создаётся при первом обращении,
+    а уникальность по пользователю не даёт параллельным запросам создать
+    вторую. Позиции корзины не загружаются.
+    """
+    key = CART_KEY.format(user_id=user.pk)
+    cached = cache.get(key)
+    if cached is None:
+        cart, created = Cart.objects.get_or_create(user=user)
+        cached = (cart.pk, cart.created_at)
+        # Корзина, созданная в откатившейся транзакции, не должна попасть в кэш.
+        transaction.on_commit(partial(cache.set, key, cached, CART_TIMEOUT))
+    cart_id, created_at = cached
+    return Cart(pk=cart_id, user=user, created_at=created_at)
+
+
+def forget_cart(user_id):
+    cache.delete(CART_KEY.format(user_id=user_id))
+
+
+def add_to_cart(cart, quantities, to_purchase=True):
+    """
+    Добавляет в корзину варианты {variant_id: quantity} одним запросом. Если
+    вариант уже лежит в корзине, количество прибавляется к имеющемуся прямо в
+    базе, поэтому параллельные добавления не теряются и не создают дублей.
+    to_purchase задаётся новым позициям, у имеющихся он не меняется.
+    Возвращает затронутые позиции.
+    """
+    if not quantities:
+        return []
+    variant_ids, counts = zip(*quantities.items())
+    with connection.cursor() as cursor:
+        cursor.execute(UPSERT_SQL.format(table=CartItem._meta.db_table), [cart.pk, to_purchase, list(variant_ids), list(counts)])
+        rows = cursor.fetchall()
+    # Сырой SQL не шлёт post_save, версию для ETag страницы продукта обновляем сами.
+    bump_model_version(CartItem)
+    return [CartItem(id=pk, cart=cart, product_variant_id=variant_id, quantity=quantity, to_purchase=to_purchase)
+            for pk, variant_id, quantity, to_purchase in rows]
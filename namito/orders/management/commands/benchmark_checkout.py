@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from namito.catalog.models import Brand, Category, Color, Product, Size, Variant
+from namito.orders.api.serializers import OrderSerializer
+from namito.orders.models import Cart, CartItem
+from namito.users.models import User
+
+CART_SIZES = (1, 10, 100)
+
+
+class Command(BaseCommand):
+    help = ('Checks out carts of 1, 10 and 100 items inside a rolled back transaction '
+            'and prints the query count and time of OrderSerializer.create.')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            variants = self.create_variants(max(CART_SIZES))
+            for size in CART_SIZES:
+                self.checkout(size, variants[:size])
+            transaction.set_rollback(True)
+
+    def create_variants(self, count):
+        # Category.save() сохраняет дважды, поэтому objects.create() с force_insert не подходит.
+        category = Category(name='Benchmark', slug='benchmark-checkout')
+        category.save()
+        brand = Brand.objects.create(name='Benchmark checkout')
+        color = Color.objects.create(name='Benchmark', color='#000000')
+        size = Size.objects.create(name='Benchmark')
+        products = Product.objects.bulk_create(
+            Product(name=f'Checkout {i}', description='', category=category, brand=brand, sku=f'CHECKOUT-{i}')
+            for i in range(count)
+        )
+        return Variant.objects.bulk_create(
+            Variant(product=product, color=color, size=size, price=1000, stock=100) for product in products
+        )
+
+    def checkout(self, size, variants):
+        user = User.objects.create(phone_number=f'+996000{size:06d}')
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.bulk_create(CartItem(cart=cart, product_variant=variant, quantity=2) for variant in variants)
+
+        request = RequestFactory().post('/api/carts/orders/create/')
+        request.user = user
+        serializer = OrderSerializer(data={'delivery_method': 'самовывоз'}, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+
+        started = time.monotonic()
+        with CaptureQueriesContext(connection) as queries:
+            serializer.save()
+            _ = serializer.data  # ответ тоже сериализуется
+        elapsed = (time.monotonic() - started) * 1000
+        self.stdout.write(f'{size:>3} items: {len(queries)} queries, {elapsed:.1f}ms')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from namito.orders.stock import release_expired_reservations
+
+
+class Command(BaseCommand):
+    help = ('Cancels unpaid card orders that have held their stock reservation longer than '
+            'ORDER_RESERVATION_TIMEOUT and returns the stock. Meant to be run from cron.')
+
+    def handle(self, *args, **options):
+        count = release_expired_reservations()
+        self.stdout.write(f'Released {count} expired reservations')
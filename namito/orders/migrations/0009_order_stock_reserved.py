@@ -0,0 +1,25 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:07
+
+from django.db import migrations, models
+
+
+def mark_delivered_orders(apps, schema_editor):
+    # До резервов остатки списывались при доставке, у доставленных заказов они уже списаны.
+    Order = apps.get_model('orders', 'Order')
+    Order.objects.filter(status=1).update(stock_reserved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_order_user_status_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='stock_reserved',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Остатки списаны'),
+        ),
+        migrations.RunPython(mark_delivered_orders, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0009_order_stock_reserved'),
+    ]
+
+    # INCREMENT BY совпадает с namito.orders.order_numbers.BLOCK_SIZE.
+    operations = [
+        migrations.RunSQL(
+            'CREATE SEQUENCE orders_order_number_seq MINVALUE 0 START WITH 0 INCREMENT BY 50',
+            'DROP SEQUENCE orders_order_number_seq',
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:17
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def merge_duplicate_items(apps, schema_editor):
+    # Дубли одного варианта в корзине сливаются в строку с меньшим id.
+    CartItem = apps.get_model('orders', 'CartItem')
+    duplicates = (CartItem.objects.filter(order__isnull=True).values('cart_id', 'product_variant_id')
+                  .annotate(first_id=Min('id'), total=Sum('quantity'), rows=Count('id')).filter(rows__gt=1)
+                  .order_by())
+    for duplicate in duplicates:
+        items = CartItem.objects.filter(order__isnull=True, cart_id=duplicate['cart_id'],
+                                        product_variant_id=duplicate['product_variant_id'])
+        items.filter(id=duplicate['first_id']).update(quantity=duplicate['total'])
+        items.exclude(id=duplicate['first_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0010_order_number_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cartitem',
+            constraint=models.UniqueConstraint(condition=models.Q(('order__isnull', True)), fields=('cart', 'product_variant'), name='cartitem_unique_open_variant'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.11 on 2026-10-18 21:20
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_carts(apps, schema_editor):
+    # Лишние корзины пользователя сливаются в корзину с меньшим id.
+    Cart = apps.get_model('orders', 'Cart')
+    CartItem = apps.get_model('orders', 'CartItem')
+    Order = apps.get_model('orders', 'Order')
+    duplicates = (Cart.objects.values('user_id').annotate(first_id=Min('id'), carts=Count('id'))
+                  .filter(carts__gt=1).order_by())
+    for duplicate in duplicates:
+        extra = Cart.objects.filter(user_id=duplicate['user_id']).exclude(id=duplicate['first_id'])
+        kept = {item.product_variant_id: item
+                for item in CartItem.objects.filter(cart_id=duplicate['first_id'], order__isnull=True)}
+        for item in CartItem.objects.filter(cart__in=extra).order_by('id'):
+            if item.order_id is None and item.product_variant_id in kept:
+                kept_item = kept[item.product_variant_id]
+                kept_item.quantity += item.quantity
+                kept_item.save(update_fields=['quantity'])
+                item.delete()
+                continue
+            item.cart_id = duplicate['first_id']
+            item.save(update_fields=['cart'])
+            if item.order_id is None:
+                kept[item.product_variant_id] = item
+        Order.objects.filter(cart__in=extra).update(cart_id=duplicate['first_id'])
+        extra.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0011_cartitem_unique_open_variant'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_carts, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cart',
+            constraint=models.UniqueConstraint(fields=('user',), name='cart_unique_user'),
+        ),
+    ]
@@ -1,11 +1,9 @@
-import random
-
 from django.db import models
 from django.utils.translation import gettext_lazy as _
-from django.db import transaction
 from django.core.exceptions import ValidationError
 
 from namito.catalog.models import Variant
+from namito.orders.order_numbers import order_numbers
 from namito.users.models import User, UserAddress
 
 
@@ -16,6 +14,10 @@ class Cart(models.Model):
     class Meta:
         verbose_name = _("Корзина")
         verbose_name_plural = _("Корзины")
+        constraints = [
+            # Корзина у пользователя одна, её создаёт namito.orders.cart.get_cart при первом обращении.
+            models.UniqueConstraint(fields=['user'], name='cart_unique_user'),
+        ]
 
     def __str__(self):
         return f"Корзина {self.user}"
@@ -35,9 +37,14 @@ class CartItem(models.Model):
     class Meta:
         verbose_name = _("Пердмет в корзине")
         verbose_name_plural = _("Предметы в корзинах")
+        constraints = [
+            # Вариант лежит в открытой корзине одной строкой, повторное добавление увеличивает количество.
+            models.UniqueConstraint(fields=['cart', 'product_variant'], condition=models.Q(order__isnull=True),
+                                    name='cartitem_unique_open_variant'),
+        ]
 
     def subtotal(self):
-        return self.product_variant.price * self.quantity
+        return self.product_variant.get_price() * self.quantity
 
     def __str__(self):
         return f"{self.quantity} x {self.product_variant}"
@@ -107,23 +114,32 @@ class Order(models.Model):
                                      related_name='orders', verbose_name=_('Адрес покупателя'))
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHODS, default='картой', verbose_name=_('Способ оплаты'))
     order_number = models.CharField(max_length=20, unique=True, blank=True, null=True, verbose_name=_('Номер заказа'))
+    stock_reserved = models.BooleanField(default=False, editable=False, verbose_name=_('Остатки списаны'))
 
     class Meta:
         verbose_name = _("Заказ")
         verbose_name_plural = _("Заказы")
+        indexes = [
+            # Проверка покупки перед отзывом: заказы пользователя со статусом «Доставлено».
+            models.Index(fields=['user', 'status'], name='order_user_status'),
+        ]
 
     def __str__(self):
         return f"Order {self.id} by {self.user}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        # Статус из базы нужен сигналам, чтобы заметить его изменение без лишнего запроса.
+        instance = super().from_db(db, field_names, values)
+        instance._original_status = instance.__dict__.get('status')
+        return instance
+
     def clean(self):
         if self.delivery_method == 'курьером' and not self.user_address:
             raise ValidationError(_('Delivery address is required for courier delivery.'))
 
     def generate_order_number(self):
-        while True:
-            order_number = f"#{random.randint(1000000000, 9999999999)}"
-            if not Order.objects.filter(order_number=order_number).exists():
-                return order_number
+        return order_numbers.next()
 
     def save(self, *args, **kwargs):
         if not self.order_number:
@@ -133,27 +149,13 @@ class Order(models.Model):
         if self.status == 2 and not OrderHistory.objects.filter(order=self).exists():
             OrderHistory.objects.create(user=self.user, order=self)
 
-        if self.status == 1:
-            with transaction.atomic():
-                ordered_items = self.ordered_items.all()
-                for ordered_item in ordered_items:
-                    variant = ordered_item.product_variant
-                    variant.stock -= ordered_item.quantity
-                    variant.save()
-
     def cancel_order(self):
         # Проверяем, можно ли отменить заказ (например, статус должен быть "В процессе")
         if self.status != 0:  # 0 - "В процессе"
             raise ValidationError(_("Order cannot be canceled in its current state."))
 
-        with transaction.atomic():
-            # Меняем статус заказа на "Отменен"
-            self.status = 2  # 2 - "Отменен"
-            self.save()
-
-            for ordered_item in self.ordered_items.all():
-                variant = ordered_item.product_variant
-                variant.stock += ordered_item.quantity
-                variant.save()
+        # Меняем статус заказа на "Отменен", остатки вернёт сигнал (namito.orders.stock.release_stock)
+        self.status = 2  # 2 - "Отменен"
+        self.save()
 
         return True
@@ -0,0 +1,59 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.db import connection, transaction
+from firebase_admin import messaging
+
+from namito.advertisement.firebase import send_message
+from namito.orders.models import Order
+
+logger = logging.getLogger(__name__)
+
+# Заголовок и окончание текста уведомления по статусу заказа, None - заказ создан.
+STATUS_MESSAGES = {
+    None: ('Заказ создан', 'создан'),
+    0: ('Заказ в процессе', 'в процессе'),
+    1: ('Заказ доставлен', 'успешно доставлен'),
+    2: ('Заказ отменен', 'был отменен'),
+    3: ('Заказ отправлен', 'отправлен'),
+}
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='order-push')
+
+
+def notify_order_status(order, created=False):
+    """
+    Ставит уведомление о статусе заказа в очередь после коммита транзакции.
+    Статус берётся на момент сохранения, пользователь и токен - при отправке.
+    """
+    status = None if created else order.status
+    transaction.on_commit(partial(_executor.submit, _send_in_background, order.pk, status))
+
+
+def _send_in_background(order_id, status):
+    try:
+        send_order_status_notification(order_id, status)
+    except Exception:
+        logger.exception('Error sending order %s notification', order_id)
+    finally:
+        connection.close()
+
+
+def build_status_message(order, status):
+    date = order.created_at.strftime("%d.%m.%Y")
+    if status in STATUS_MESSAGES:
+        title, state = STATUS_MESSAGES[status]
+        body = f'Ваш заказ: {order.order_number} от {date} {state}.'
+    else:
+        title = 'Статус заказа изменен'
+        body = f'Новый статус вашего заказа: {order.order_number} от {date}: {order.get_status_display()}.'
+    return messaging.Message(notification=messaging.Notification(title=title, body=body),
+                             token=order.user.fcm_token)
+
+
+def send_order_status_notification(order_id, status):
+    order = Order.objects.select_related('user').filter(pk=order_id).first()
+    if order is None or not order.user.fcm_token:
+        return None
+    return send_message(build_status_message(order, status))
@@ -0,0 +1,57 @@
+import os
+import threading
+
+from django.apps import apps
+from django.db import connection
+
+SEQUENCE = 'orders_order_number_seq'
+# Совпадает с INCREMENT BY последовательности в миграции 0010_order_number_sequence.
+BLOCK_SIZE = 50
+
+# Значения последовательности переставляются по модулю NUMBER_SPACE, чтобы
+# номера оставались десятизначными и не выдавали число заказов. MULTIPLIER
+# взаимно прост с NUMBER_SPACE, поэтому разные значения дают разные номера.
+NUMBER_SPACE = 9_000_000_000
+MULTIPLIER = 2_654_435_761
+OFFSET = 1_000_000_000
+
+
+def format_order_number(value):
+    return f'#{value * MULTIPLIER % NUMBER_SPACE + OFFSET}'
+
+
+class OrderNumberAllocator:
+    """
+    Выдаёт номера заказов из блоков по BLOCK_SIZE значений последовательности.
+    Блок берётся одним nextval, так что большинство заказов получает номер
+    без запроса к базе.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._numbers = []
+        self._pid = None
+
+    def next(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Блок родительского процесса не должен достаться нескольким воркерам.
+                self._pid = os.getpid()
+                self._numbers = []
+            while not self._numbers:
+                self._numbers = self._allocate_block()
+            return self._numbers.pop()
+
+    @staticmethod
+    def _allocate_block():
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT nextval(%s)', [SEQUENCE])
+            start = cursor.fetchone()[0]
+        numbers = [format_order_number(value) for value in range(start, start + BLOCK_SIZE)]
+        # Номер из блока мог случайно достаться заказу, оформленному до последовательности.
+        Order = apps.get_model('orders', 'Order')
+        taken = set(Order.objects.filter(order_number__in=numbers).values_list('order_number', flat=True))
+        return [number for number in reversed(numbers) if number not in taken]
+
+
+order_numbers = OrderNumberAllocator()
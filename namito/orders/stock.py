@@ -0,0 +1,99 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from namito.catalog.models import Variant
+from namito.orders.models import Order
+from namito.pages.cache import bump_model_version
+
+
+class OutOfStockError(ValidationError):
+    def __init__(self, variant_ids):
+        super().__init__(_('Not enough stock for some items.'), code='out_of_stock')
+        self.variant_ids = variant_ids
+
+
+def _order_quantities(order):
+    quantities = defaultdict(int)
+    for variant_id, quantity in order.ordered_items.values_list('product_variant_id', 'quantity'):
+        quantities[variant_id] += quantity
+    return quantities
+
+
+def _lock_variants(variant_ids):
+    # Блокировки всегда берутся по возрастанию pk, поэтому параллельные заказы
+    # с пересекающимися вариантами ждут друг друга, а не попадают в дедлок.
+    # FOR NO KEY UPDATE не конфликтует с FOR KEY SHARE, который берёт вставка
+    # OrderedItem по внешнему ключу: иначе два заказа одного варианта ждали бы
+    # друг друга после bulk_create.
+    return dict(Variant.objects.select_for_update(no_key=True).filter(pk__in=variant_ids)
+                .order_by('pk').values_list('pk', 'stock'))
+
+
+def _shift_stock(deltas):
+    """Меняет остатки вариантов на deltas одним UPDATE. Варианты без учёта остатка (NULL) не трогаются."""
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    Variant.objects.filter(pk__in=deltas, stock__isnull=False).update(
+        stock=F('stock') + Case(*[When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()],
+                                output_field=IntegerField())
+    )
+    bump_model_version(Variant)
+
+
+def reserve_stock(order, strict=True):
+    """
+    Списывает со склада позиции заказа. При strict=True заказ без достаточного
+    остатка не резервируется и выбрасывается OutOfStockError, иначе списывается
+    сколько есть. Повторный вызов для того же заказа ничего не делает.
+    """
+    with transaction.atomic():
+        if not Order.objects.filter(pk=order.pk, stock_reserved=False).update(stock_reserved=True):
+            return False
+        quantities = _order_quantities(order)
+        stocks = _lock_variants(quantities)
+        if strict:
+            missing = [pk for pk, quantity in quantities.items()
+                       if pk in stocks and stocks[pk] is not None and stocks[pk] < quantity]
+            if missing:
+                raise OutOfStockError(missing)
+        else:
+            quantities = {pk: min(quantity, stocks.get(pk) or 0) for pk, quantity in quantities.items()}
+        _shift_stock({pk: -quantity for pk, quantity in quantities.items()})
+    order.stock_reserved = True
+    return True
+
+
+def release_stock(order):
+    """Возвращает на склад позиции заказа. Повторный вызов ничего не делает."""
+    with transaction.atomic():
+        if not Order.objects.filter(pk=order.pk, stock_reserved=True).update(stock_reserved=False):
+            return False
+        quantities = _order_quantities(order)
+        _lock_variants(quantities)
+        _shift_stock(quantities)
+    order.stock_reserved = False
+    return True
+
+
+def release_expired_reservations():
+    """
+    Отменяет неоплаченные заказы с оплатой картой, которые держат резерв
+    дольше ORDER_RESERVATION_TIMEOUT секунд. Остатки возвращает сигнал отмены.
+    """
+    deadline = timezone.now() - timedelta(seconds=settings.ORDER_RESERVATION_TIMEOUT)
+    with transaction.atomic():
+        expired = list(Order.objects.select_for_update(skip_locked=True).filter(
+            status=0, payment_status=0, payment_method='картой', stock_reserved=True, created_at__lt=deadline
+        ))
+        for order in expired:
+            order.status = 2
+            order.save(update_fields=['status'])
+    return len(expired)
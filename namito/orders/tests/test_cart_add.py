@@ -0,0 +1,109 @@
+import threading
+
+import pytest
+from django.db import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.cart import add_to_cart
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def test_add_to_cart_is_a_single_statement():
+    cart = Cart.objects.create(user=UserFactory())
+    shirt, socks = VariantFactory(), VariantFactory()
+    CartItem.objects.create(cart=cart, product_variant=shirt, quantity=2, to_purchase=False)
+
+    with CaptureQueriesContext(connection) as queries:
+        items = add_to_cart(cart, {shirt.pk: 3, socks.pk: 1})
+
+    assert len(queries) == 1
+    assert {item.product_variant_id: (item.quantity, item.to_purchase) for item in items} == {
+        shirt.pk: (5, False), socks.pk: (1, True),
+    }
+    assert cart.items.count() == 2  # noqa: PLR2004
+
+
+def test_duplicate_open_items_are_rejected():
+    cart = Cart.objects.create(user=UserFactory())
+    shirt = VariantFactory()
+    CartItem.objects.create(cart=cart, product_variant=shirt)
+
+    with pytest.raises(IntegrityError):
+        CartItem.objects.create(cart=cart, product_variant=shirt)
+
+
+def test_add_endpoint_returns_merged_item():
+    user, shirt = UserFactory(), VariantFactory(stock=5)
+    client = client_for(user)
+
+    client.post("/api/carts/add/", {"product_variant": shirt.pk, "quantity": 1})
+    response = client.post("/api/carts/add/", {"product_variant": shirt.pk, "quantity": 2})
+
+    assert response.status_code == 201  # noqa: PLR2004
+    item = CartItem.objects.get(cart__user=user)
+    assert (response.data["id"], response.data["quantity"]) == (item.pk, 3)
+
+
+def test_add_endpoint_keeps_to_purchase_of_new_items():
+    user, shirt, socks = UserFactory(), VariantFactory(stock=5), VariantFactory(stock=5)
+    client = client_for(user)
+
+    client.post("/api/carts/add/", {"product_variant": shirt.pk, "to_purchase": False}, format="json")
+    client.post("/api/carts/add/", {"product_variant": socks.pk}, format="json")
+    response = client.post("/api/carts/add/", {"product_variant": shirt.pk, "to_purchase": True}, format="json")
+
+    assert response.data["to_purchase"] is False
+    assert dict(CartItem.objects.filter(cart__user=user).values_list("product_variant_id", "to_purchase")) == {
+        shirt.pk: False, socks.pk: True,
+    }
+
+
+def test_update_cannot_move_item_onto_a_taken_variant():
+    user = UserFactory()
+    cart = Cart.objects.create(user=user)
+    shirt, socks, hat = VariantFactory(stock=5), VariantFactory(stock=5), VariantFactory(stock=5)
+    first = CartItem.objects.create(cart=cart, product_variant=shirt)
+    second = CartItem.objects.create(cart=cart, product_variant=socks)
+
+    response = client_for(user).put("/api/carts/multi-update/", {"items": [
+        {"id": first.pk, "product_variant": socks.pk},
+        {"id": second.pk, "product_variant": hat.pk},
+        {"id": first.pk, "product_variant": hat.pk},
+    ]}, format="json")
+
+    assert [item["id"] for item in response.data["updated_items"]] == [second.pk]
+    assert [error["id"] for error in response.data["errors"]] == [first.pk, first.pk]
+    assert dict(cart.items.values_list("id", "product_variant_id")) == {first.pk: shirt.pk, second.pk: hat.pk}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_taps_add_up():
+    user, shirt = UserFactory(), VariantFactory(stock=100)
+    Cart.objects.create(user=user)
+
+    def tap():
+        try:
+            client_for(user).post("/api/carts/add/", {"product_variant": shirt.pk, "quantity": 1})
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=tap) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert list(CartItem.objects.filter(cart__user=user).values_list("quantity", flat=True)) == [10]
@@ -0,0 +1,122 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture()
+def user():
+    return UserFactory()
+
+
+@pytest.fixture()
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def variants(count):
+    result = [VariantFactory(stock=10) for _ in range(count)]
+    for variant in result:
+        ImageFactory(product=variant.product)
+    return result
+
+
+def add(client, items):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post("/api/carts/cart/add-multiple/", {"items": items}, format="json")
+    return response, len(queries)
+
+
+def update(client, items):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.put("/api/carts/multi-update/", {"items": items}, format="json")
+    return response, len(queries)
+
+
+def quantities(user):
+    return dict(CartItem.objects.filter(cart__user=user).values_list("product_variant_id", "quantity"))
+
+
+def test_add_merges_with_existing_items(client, user):
+    shirt, socks = variants(2)
+    CartItem.objects.create(cart=Cart.objects.create(user=user), product_variant=shirt, quantity=1)
+
+    response, _ = add(client, [{"product_variant": shirt.pk, "quantity": 2},
+                                {"product_variant": socks.pk, "quantity": 1},
+                                {"product_variant": socks.pk, "quantity": 3}])
+
+    assert response.status_code == 201  # noqa: PLR2004
+    assert quantities(user) == {shirt.pk: 3, socks.pk: 4}
+    assert response.data["total_amount"] == shirt.price * 3 + socks.price * 4
+    assert all(item["product_image"] for item in response.data["items"])
+
+
+def test_add_reports_errors_per_item(client, user):
+    shirt, sold_out = VariantFactory(stock=5), VariantFactory(stock=0)
+
+    response, _ = add(client, [{"product_variant": shirt.pk, "quantity": 1},
+                                {"product_variant": sold_out.pk, "quantity": 1},
+                                {"product_variant": 0, "quantity": 1}])
+
+    assert response.status_code == 400  # noqa: PLR2004
+    assert response.data[0] == {}
+    assert response.data[1]["product_variant"] == ["Product variant is out of stock."]
+    assert response.data[2]["product_variant"] == ["Product variant does not exist."]
+    assert quantities(user) == {}
+
+
+def test_add_query_count_does_not_depend_on_item_count(client, user):
+    shirt, socks, hat, *fifty = variants(53)
+    cart = Cart.objects.create(user=user)
+    for variant in (shirt, socks):
+        CartItem.objects.create(cart=cart, product_variant=variant)
+
+    _, two = add(client, [{"product_variant": v.pk, "quantity": 1} for v in (shirt, hat)])
+    _, fifty_one = add(client, [{"product_variant": v.pk, "quantity": 1} for v in [socks, *fifty]])
+
+    assert fifty_one == two
+    assert len(quantities(user)) == 53  # noqa: PLR2004
+
+
+def test_update_applies_valid_items_and_reports_the_rest(client, user):
+    shirt, socks, sold_out = VariantFactory(stock=5), VariantFactory(stock=5), VariantFactory(stock=0)
+    cart = Cart.objects.create(user=user)
+    first = CartItem.objects.create(cart=cart, product_variant=shirt, quantity=1)
+    second = CartItem.objects.create(cart=cart, product_variant=socks, quantity=1)
+    foreign = CartItem.objects.create(cart=Cart.objects.create(user=UserFactory()), product_variant=shirt)
+
+    response, _ = update(client, [{"id": first.pk, "quantity": 4, "to_purchase": False},
+                                   {"id": second.pk, "product_variant": sold_out.pk},
+                                   {"id": foreign.pk, "quantity": 2},
+                                   {"id": second.pk, "quantity": -1}])
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.data["updated_items"] == [
+        {"id": first.pk, "product_variant": shirt.pk, "quantity": 4, "to_purchase": False},
+    ]
+    assert [error["id"] for error in response.data["errors"]] == [second.pk, foreign.pk, second.pk]
+    assert response.data["errors"][0]["errors"] == {"product_variant": ["Product variant is out of stock."]}
+    assert quantities(user) == {shirt.pk: 4, socks.pk: 1}
+    foreign.refresh_from_db()
+    assert foreign.quantity == 1
+
+
+def test_update_query_count_does_not_depend_on_item_count(client, user):
+    cart = Cart.objects.create(user=user)
+    items = [CartItem.objects.create(cart=cart, product_variant=variant) for variant in variants(51)]
+
+    _, one = update(client, [{"id": item.pk, "quantity": 2} for item in items[:1]])
+    _, fifty = update(client, [{"id": item.pk, "quantity": 3} for item in items[1:]])
+
+    assert fifty == one
+    assert set(quantities(user).values()) == {2, 3}
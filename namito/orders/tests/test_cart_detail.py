@@ -0,0 +1,77 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.orders.models import Order
+from namito.orders.models import OrderedItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def variants(count):
+    result = [VariantFactory(price=100) for _ in range(count)]
+    for variant in result:
+        ImageFactory(product=variant.product)
+    return result
+
+
+def get(user, url):
+    client = APIClient()
+    client.force_authenticate(user)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200  # noqa: PLR2004
+    return response, len(queries)
+
+
+def cart_with(items):
+    user = UserFactory()
+    cart = Cart.objects.create(user=user)
+    for variant in items:
+        CartItem.objects.create(cart=cart, product_variant=variant, quantity=2)
+    return user
+
+
+def order_with(items):
+    user = UserFactory()
+    order = Order.objects.create(user=user, total_amount=100, delivery_method="самовывоз")
+    for variant in items:
+        OrderedItem.objects.create(order=order, product_variant=variant)
+    return user, order
+
+
+def test_cart_shows_main_image_and_discounted_total():
+    shirt = VariantFactory(price=100, discount_value=10, discount_type="percent")
+    ImageFactory(product=shirt.product)
+    main = ImageFactory(product=shirt.product, main_image=True)
+    socks = VariantFactory(price=50)
+
+    response, _ = get(cart_with([shirt, socks]), "/api/carts/detail/")
+
+    assert response.data["total_amount"] == 280  # noqa: PLR2004
+    images = {item["product_variant"]["id"]: item["product_image"] for item in response.data["items"]}
+    assert images[shirt.pk].endswith(main.image.url)
+    assert images[socks.pk] is None
+
+
+def test_cart_query_count_does_not_depend_on_cart_size():
+    _, one = get(cart_with(variants(1)), "/api/carts/detail/")
+    _, twenty = get(cart_with(variants(20)), "/api/carts/detail/")
+
+    assert twenty == one
+
+
+def test_order_query_count_does_not_depend_on_order_size():
+    user, order = order_with(variants(1))
+    _, one = get(user, f"/api/carts/orders/{order.pk}/")
+    user, order = order_with(variants(20))
+    response, twenty = get(user, f"/api/carts/orders/{order.pk}/")
+
+    assert twenty == one
+    assert all(item["product_image"] for item in response.data["items"])
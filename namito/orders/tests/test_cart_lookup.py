@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+from django.db import IntegrityError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.cart import get_cart
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_cart_is_created_once_and_then_read_from_cache(django_capture_on_commit_callbacks):
+    user = UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        cart = get_cart(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        cached = get_cart(user)
+
+    assert len(queries) == 0
+    assert (cached.pk, cached.created_at) == (cart.pk, Cart.objects.get(user=user).created_at)
+
+
+def test_second_cart_is_rejected():
+    user = UserFactory()
+    Cart.objects.create(user=user)
+
+    with pytest.raises(IntegrityError):
+        Cart.objects.create(user=user)
+
+
+def test_deleted_cart_is_forgotten(django_capture_on_commit_callbacks):
+    user = UserFactory()
+    with django_capture_on_commit_callbacks(execute=True):
+        old = get_cart(user)
+    Cart.objects.filter(pk=old.pk).delete()
+
+    assert get_cart(user).pk != old.pk
+
+
+def test_multi_update_without_cart_reports_missing_items():
+    user = UserFactory()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    response = client.put("/api/carts/multi-update/", {"items": [{"id": 1, "quantity": 2}]}, format="json")
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.data["errors"][0]["id"] == 1
+    assert Cart.objects.filter(user=user).count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_first_requests_in_parallel_share_one_cart():
+    user, shirt = UserFactory(), VariantFactory(stock=100)
+
+    def add():
+        try:
+            client = APIClient()
+            client.force_authenticate(user)
+            client.post("/api/carts/add/", {"product_variant": shirt.pk, "quantity": 1})
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=add) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert Cart.objects.filter(user=user).count() == 1
+    assert CartItem.objects.get(cart__user=user).quantity == 8  # noqa: PLR2004
@@ -0,0 +1,53 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.orders.models import OrderedItem
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def checkout(variants, **discounts):
+    user = UserFactory()
+    cart = Cart.objects.create(user=user)
+    for variant in variants:
+        CartItem.objects.create(cart=cart, product_variant=variant, quantity=2)
+    CartItem.objects.create(cart=cart, product_variant=VariantFactory(), quantity=1, to_purchase=False)
+    client = APIClient()
+    client.force_authenticate(user)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.post("/api/carts/orders/create/", {"delivery_method": "самовывоз"})
+
+    assert response.status_code == 201  # noqa: PLR2004
+    return response, len(queries), cart
+
+
+def test_checkout_moves_items_to_order():
+    variants = [VariantFactory(price=100), VariantFactory(price=200, discount_value=10, discount_type="percent")]
+    ImageFactory(product=variants[0].product)
+
+    response, _, cart = checkout(variants)
+
+    assert response.data["total_amount"] == 560  # noqa: PLR2004
+    assert sorted(item["product_variant"]["id"] for item in response.data["items"]) == sorted(v.pk for v in variants)
+    assert response.data["items"][0]["product_image"] or response.data["items"][1]["product_image"]
+    assert OrderedItem.objects.filter(order_id=response.data["id"]).count() == len(variants)
+    assert list(cart.items.values_list("to_purchase", flat=True)) == [False]
+
+
+def test_checkout_query_count_does_not_depend_on_cart_size():
+    variants = [VariantFactory() for _ in range(10)]
+    for variant in variants:
+        ImageFactory(product=variant.product)
+
+    _, one, _ = checkout(variants[:1])
+    _, ten, _ = checkout(variants)
+
+    assert ten == one
@@ -0,0 +1,70 @@
+import re
+import threading
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from namito.orders.models import Order
+from namito.orders.order_numbers import BLOCK_SIZE
+from namito.orders.order_numbers import OrderNumberAllocator
+from namito.orders.order_numbers import format_order_number
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_format_is_ten_digits_and_collision_free():
+    numbers = {format_order_number(value) for value in range(100_000)}
+
+    assert len(numbers) == 100_000  # noqa: PLR2004
+    assert all(re.fullmatch(r"#\d{10}", number) for number in numbers)
+
+
+def test_orders_take_numbers_from_blocks(monkeypatch):
+    monkeypatch.setattr("namito.orders.models.order_numbers", OrderNumberAllocator())
+    user = UserFactory()
+
+    with CaptureQueriesContext(connection) as queries:
+        orders = [Order.objects.create(user=user, total_amount=1, delivery_method="самовывоз")
+                  for _ in range(BLOCK_SIZE)]
+
+    assert len({order.order_number for order in orders}) == BLOCK_SIZE
+    assert len([query for query in queries.captured_queries if "nextval" in query["sql"]]) == 1
+
+
+def test_block_skips_numbers_of_old_orders():
+    OrderNumberAllocator().next()
+    legacy = format_order_number(_last_value() + BLOCK_SIZE + 3)
+    Order.objects.create(user=UserFactory(), total_amount=1, order_number=legacy, delivery_method="самовывоз")
+
+    allocator = OrderNumberAllocator()
+    numbers = [allocator.next() for _ in range(BLOCK_SIZE - 1)]
+
+    assert legacy not in numbers
+    assert len(set(numbers)) == BLOCK_SIZE - 1
+
+
+def test_concurrent_workers_get_unique_numbers():
+    numbers = []
+
+    def worker():
+        allocator = OrderNumberAllocator()
+        try:
+            numbers.extend(allocator.next() for _ in range(120))
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(numbers) == len(set(numbers)) == 720  # noqa: PLR2004
+
+
+def _last_value():
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT last_value FROM orders_order_number_seq")
+        return cursor.fetchone()[0]
@@ -0,0 +1,31 @@
+import pytest
+
+from namito.catalog.models import Variant
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Order
+from namito.orders.models import OrderedItem
+from namito.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+USERS = 500
+
+
+@pytest.fixture()
+def users():
+    variant = VariantFactory()
+    users = User.objects.bulk_create(User(phone_number=f"+996{i:09d}") for i in range(USERS))
+    orders = Order.objects.bulk_create(
+        Order(user=user, total_amount=1000, status=i % 4) for i, user in enumerate(users)
+    )
+    OrderedItem.objects.bulk_create(OrderedItem(order=order, product_variant=variant) for order in orders)
+    return users
+
+
+def test_purchase_check_uses_user_status_index(users, query_plan):
+    variants = Variant.objects.all()
+    plan = query_plan(OrderedItem.objects.filter(order__user=users[1], product_variant__in=variants,
+                                                 order__status=1))
+
+    assert "Seq Scan" not in plan, plan
+    assert "order_user_status" in plan, plan
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from firebase_admin import exceptions
+
+from namito.advertisement import firebase
+from namito.orders import notifications
+from namito.orders.models import Order
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+class ImmediateExecutor:
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class FakeMessaging:
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.sent = []
+
+    def send(self, message):
+        if self.failures:
+            self.failures -= 1
+            raise exceptions.UnavailableError("unavailable")
+        self.sent.append(message)
+        return f"message-{len(self.sent)}"
+
+
+@pytest.fixture()
+def client(monkeypatch):
+    client = FakeMessaging()
+    monkeypatch.setattr(firebase, "messaging", client)
+    monkeypatch.setattr(firebase, "SEND_RETRY_BACKOFF", 0)
+    monkeypatch.setattr(notifications, "_executor", ImmediateExecutor())
+    return client
+
+
+@pytest.fixture()
+def order():
+    return Order.objects.create(user=UserFactory(fcm_token="token"), total_amount=100, delivery_method="самовывоз")
+
+
+def titles(client):
+    return [message.notification.title for message in client.sent]
+
+
+def test_notification_is_sent_after_commit(client, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks() as callbacks:
+        Order.objects.create(user=UserFactory(fcm_token="token"), total_amount=100, delivery_method="самовывоз")
+        assert client.sent == []
+
+    for callback in callbacks:
+        callback()
+    assert titles(client) == ["Заказ создан"]
+
+
+def test_status_change_costs_no_extra_query(client, order, django_capture_on_commit_callbacks):
+    order = Order.objects.get(pk=order.pk)
+    order.status = 3
+
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=False) as callbacks:
+        order.save()
+
+    assert not [query for query in queries.captured_queries if query["sql"].startswith('SELECT "orders_order"')]
+    for callback in callbacks:
+        callback()
+    assert titles(client) == ["Заказ отправлен"]
+
+
+def test_unchanged_status_sends_nothing(client, order, django_capture_on_commit_callbacks):
+    order = Order.objects.get(pk=order.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order.payment_status = 2
+        order.save()
+
+    assert client.sent == []
+
+
+def test_temporary_errors_are_retried(client, order, django_capture_on_commit_callbacks):
+    client.failures = 2
+    order = Order.objects.get(pk=order.pk)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order.status = 1
+        order.save()
+
+    assert titles(client) == ["Заказ доставлен"]
@@ -0,0 +1,161 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Cart
+from namito.orders.models import CartItem
+from namito.orders.models import Order
+from namito.orders.models import OrderedItem
+from namito.orders import stock as stock_module
+from namito.orders.stock import release_expired_reservations
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def _no_push(monkeypatch):
+    monkeypatch.setattr("namito.orders.signals.notify_order_status", lambda *args, **kwargs: None)
+
+
+def checkout(user, *items, payment_method="наличкой"):
+    cart, _ = Cart.objects.get_or_create(user=user)
+    for variant, quantity in items:
+        CartItem.objects.create(cart=cart, product_variant=variant, quantity=quantity)
+    client = APIClient()
+    client.force_authenticate(user)
+    return client.post("/api/carts/orders/create/", {"delivery_method": "самовывоз", "payment_method": payment_method})
+
+
+def stock(variant):
+    variant.refresh_from_db()
+    return variant.stock
+
+
+def test_checkout_reserves_stock_once():
+    shirt, socks = VariantFactory(stock=5), VariantFactory(stock=None)
+
+    response = checkout(UserFactory(), (shirt, 2), (socks, 3))
+
+    assert response.status_code == 201  # noqa: PLR2004
+    assert (stock(shirt), stock(socks)) == (3, None)
+    order = Order.objects.get(pk=response.data["id"])
+    order.status = 1
+    order.save()
+    order.save()
+    assert stock(shirt) == 3  # noqa: PLR2004
+
+
+def test_checkout_fails_without_stock():
+    shirt, hat = VariantFactory(stock=5), VariantFactory(stock=1)
+    user = UserFactory()
+
+    response = checkout(user, (shirt, 2), (hat, 2))
+
+    assert response.status_code == 400  # noqa: PLR2004
+    assert response.data["product_variants"] == [str(hat.pk)]
+    assert (stock(shirt), stock(hat)) == (5, 1)
+    assert not Order.objects.exists()
+    assert CartItem.objects.filter(cart__user=user).count() == 2  # noqa: PLR2004
+
+
+def test_cancel_returns_stock_once():
+    shirt = VariantFactory(stock=5)
+    order = Order.objects.get(pk=checkout(UserFactory(), (shirt, 2)).data["id"])
+
+    order.cancel_order()
+    order.save()
+    Order.objects.get(pk=order.pk).save()
+
+    assert stock(shirt) == 5  # noqa: PLR2004
+
+
+def test_delivery_of_order_without_reservation_takes_what_is_left():
+    shirt = VariantFactory(stock=1)
+    order = Order.objects.create(user=UserFactory(), total_amount=100, delivery_method="самовывоз")
+    OrderedItem.objects.create(order=order, product_variant=shirt, quantity=2)
+
+    order.status = 1
+    order.save()
+    order.save()
+
+    assert stock(shirt) == 0
+
+
+def test_expired_card_reservations_are_released(settings):
+    shirt = VariantFactory(stock=5)
+    stale = checkout(UserFactory(), (shirt, 1), payment_method="картой").data["id"]
+    fresh = checkout(UserFactory(), (shirt, 1), payment_method="картой").data["id"]
+    cash = checkout(UserFactory(), (shirt, 1)).data["id"]
+    Order.objects.filter(pk__in=[stale, cash]).update(created_at=timezone.now() - timedelta(days=2))
+
+    assert release_expired_reservations() == 1
+    assert stock(shirt) == 3  # noqa: PLR2004
+    assert dict(Order.objects.values_list("pk", "status")) == {stale: 2, fresh: 0, cash: 0}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_checkouts_do_not_oversell():
+    shirt, socks = VariantFactory(stock=5), VariantFactory(stock=100)
+    users = [UserFactory() for _ in range(12)]
+    statuses = []
+
+    def buy(user, items):
+        try:
+            statuses.append(checkout(user, *items).status_code)
+        finally:
+            connection.close()
+
+    # Половина покупателей кладёт варианты в обратном порядке, чтобы проверить порядок блокировок.
+    threads = [
+        threading.Thread(target=buy, args=(user, [(shirt, 1), (socks, 1)][::1 if i % 2 else -1]))
+        for i, user in enumerate(users)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201] * 5 + [400] * 7
+    assert (stock(shirt), stock(socks)) == (0, 95)
+    assert Order.objects.count() == 5  # noqa: PLR2004
+
+
+@pytest.mark.django_db(transaction=True)
+def test_orders_of_the_same_variant_do_not_deadlock(monkeypatch):
+    shirt = VariantFactory(stock=1)
+    users = [UserFactory(), UserFactory()]
+    statuses = []
+    # Django создаёт внешние ключи отложенными, проверка OrderedItem -> Variant
+    # с FOR KEY SHARE обычно идёт при коммите. Здесь она выполняется сразу, и оба
+    # заказа держат KEY SHARE на варианте, прежде чем блокировать остатки.
+    barrier = threading.Barrier(len(users), timeout=5)
+    lock_variants = stock_module._lock_variants
+
+    def lock_after_both_inserted(variant_ids):
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        barrier.wait()
+        return lock_variants(variant_ids)
+
+    monkeypatch.setattr(stock_module, "_lock_variants", lock_after_both_inserted)
+
+    def buy(user):
+        try:
+            statuses.append(checkout(user, (shirt, 1)).status_code)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=buy, args=(user,)) for user in users]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(statuses) == [201, 400]
+    assert stock(shirt) == 0
@@ -1,7 +1,6 @@
 from rest_framework import serializers
 
-from namito.catalog.api.serializers import ProductListSerializer
-from namito.catalog.models import Product, Category
+from namito.catalog.category_tree import get_category_tree, render_categories
 from namito.pages.models import (
     MainPageSlider,
     MainPage,
@@ -41,13 +40,12 @@ class MainPageSliderSerializer(serializers.ModelSerializer):
 class MainPageSerializer(serializers.ModelSerializer):
     slider = serializers.SerializerMethodField()
     advertisement = serializers.SerializerMethodField()
-    top_products = serializers.SerializerMethodField()
 
     class Meta:
         model = MainPage
         fields = ['banner1', 'banner2', 'banner3', 'title', 'description', 'counter1_title',
                   'counter1_value', 'counter2_title', 'counter2_value', 'counter3_title',
-                  'counter3_value', 'button_link', 'button', 'slider', 'advertisement', 'top_products']
+                  'counter3_value', 'button_link', 'button', 'slider', 'advertisement']
 
     def get_advertisement(self, page):
         slider_qs = Advertisement.objects.filter(page=page)
@@ -57,13 +55,6 @@ class MainPageSerializer(serializers.ModelSerializer):
         slider_qs = MainPageSlider.objects.filter(page=page)
         return MainPageSliderSerializer(slider_qs, many=True, context=self.context).data
 
-    def get_top_products(self, page):
-        products = Product.objects.filter(is_top=True, variants__stock__gt=0).distinct().order_by('?')[:15]
-        serializer = ProductListSerializer(products, many=True, read_only=True,
-                                           context={'request': self.context['request']})
-        # Фильтруем продукты, которые были преобразованы в None
-        return [product for product in serializer.data if product is not None]
-
 
 class FAQSerializer(serializers.ModelSerializer):
     class Meta:
@@ -121,33 +112,13 @@ class ContactsSerializer(serializers.ModelSerializer):
         return data
 
     def get_promoted_categories(self, obj):
-        categories = Category.objects.filter(promotion=True)
-        request = self.context.get('request')
-        data = [{'name': category.name, 'slug': category.slug, 'icon': request.build_absolute_uri(category.icon.url) if category.icon else None} for category in categories]
-        return data
+        nodes = sorted((node for node in get_category_tree()['nodes'].values() if node['promotion']),
+                       key=lambda node: (node['order'], node['name']))
+        return render_categories(nodes, self.context.get('request'), fields=('name', 'slug', 'icon'))
 
     def get_categories(self, obj):
-
-        def get_nested_categories_data(category):
-            request = self.context.get('request')
-            category_data = {
-                'name': category.name,
-                'slug': category.slug,
-                'icon': request.build_absolute_uri(category.icon.url) if category.icon else None,
-                'children': []
-            }
-            children_categories = category.children.all()
-            for child_category in children_categories:
-                child_data = get_nested_categories_data(child_category)
-                category_data['children'].append(child_data)
-            return category_data
-
-        root_categories = Category.objects.filter(parent__isnull=True)
-        categories_data = []
-        for root_category in root_categories:
-            root_category_data = get_nested_categories_data(root_category)
-            categories_data.append(root_category_data)
-        return categories_data
+        roots = get_category_tree()['roots']
+        return render_categories(roots, self.context.get('request'), fields=('name', 'slug', 'icon', 'children'))
 
 
 class LayoutSeoSerializer(serializers.ModelSerializer):
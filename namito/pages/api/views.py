@@ -3,13 +3,39 @@ from rest_framework.response import Response
 
 from django.shortcuts import get_object_or_404
 
+from namito.advertisement.models import Advertisement
+from namito.catalog.api.serializers import ProductListSerializer
+from namito.catalog.models import Category, Product
+from namito.catalog.personalization import PersonalizedResponseMixin
+from namito.catalog.top_products import sample_top_products
 from namito.pages.api.serializers import MainPageSerializer, StaticPageSerializer, ContactsSerializer, LayoutSeoSerializer
-from namito.pages.models import MainPage, StaticPage, Contacts, MainPageLayoutMeta
+from namito.pages.cache import CachedResponseMixin, ConditionalGetMixin
+from namito.pages.models import (
+    MainPage, MainPageSlider, StaticPage, FAQ, Contacts, Phone, Email, SocialLink, PaymentMethod, MainPageLayoutMeta
+)
 from namito.pages.api import pages_default_texts
 
 
-class MainPageView(generics.RetrieveAPIView):
+def render_top_products(request):
+    """
+    Случайные топ-продукты главной страницы. Выборка новая на каждый запрос,
+    поэтому в кэш ответа главной страницы она не попадает.
+    """
+    products = ProductListSerializer.setup_eager_loading(Product.objects.all())
+    products = sample_top_products(products, 15, in_stock=True)
+    serializer = ProductListSerializer(products, many=True, read_only=True, context={'request': request})
+    # Фильтруем продукты, которые были преобразованы в None
+    return [product for product in serializer.data if product is not None]
+
+
+class MainPageView(PersonalizedResponseMixin, CachedResponseMixin, generics.RetrieveAPIView):
+    """
+    Кэшируется только постоянная часть страницы. Топ-продукты выбираются
+    заново на каждый запрос и добавляются после кэша, поэтому ETag у страницы нет.
+    """
     serializer_class = MainPageSerializer
+    cache_models = (MainPage, MainPageSlider, Advertisement)
+    cache_authenticated = True
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -53,10 +79,17 @@ class MainPageView(generics.RetrieveAPIView):
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:  # noqa: PLR2004
+            response.data = {**response.data, 'top_products': render_top_products(request)}
+        return response
+
 
-class StaticPageDetailView(generics.RetrieveAPIView):
+class StaticPageDetailView(CachedResponseMixin, generics.RetrieveAPIView):
     queryset = StaticPage.objects.all()
     serializer_class = StaticPageSerializer
+    cache_models = (StaticPage, FAQ)
     lookup_field = 'slug'
 
     def get_object(self):
@@ -97,8 +130,9 @@ class StaticPageDetailView(generics.RetrieveAPIView):
         return Response(serializer.data)
 
 
-class LayoutView(generics.RetrieveAPIView):
+class LayoutView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveAPIView):
     serializer_class = ContactsSerializer
+    cache_models = (Contacts, Phone, Email, SocialLink, PaymentMethod, Category)
 
     def get_object(self):
         # Получаем первый объект Contacts или вызываем 404 ошибку, если объект не найден
@@ -112,6 +146,7 @@ class LayoutView(generics.RetrieveAPIView):
         return context
 
 
-class LayoutSeoAPIView(generics.ListAPIView):
+class LayoutSeoAPIView(CachedResponseMixin, generics.ListAPIView):
     queryset = MainPageLayoutMeta.objects.all()
     serializer_class = LayoutSeoSerializer
+    cache_models = (MainPageLayoutMeta,)
@@ -0,0 +1,124 @@
+import hashlib
+import time
+from functools import partial
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from modeltranslation.utils import get_language
+from rest_framework.response import Response
+
+VERSION_KEY = 'models:version:{label}'
+RESPONSE_KEY = 'response:{digest}'
+CACHE_TIMEOUT = 60 * 60
+
+# Приложения, для моделей которых ведутся версии. Изменения в них сбрасывают
+# кэш ответов и ETag.
+VERSIONED_APPS = ('catalog', 'pages', 'advertisement', 'orders', 'users')
+
+
+def _new_version():
+    # Версия - время изменения в наносекундах. Она же даёт Last-Modified, и если
+    # счётчик вытеснили из кэша, новая версия не совпадёт со старой.
+    return time.time_ns()
+
+
+def get_model_versions(models):
+    """Текущие номера версий моделей, по одному запросу к кэшу на вызов."""
+    keys = {model._meta.label_lower: VERSION_KEY.format(label=model._meta.label_lower) for model in models}
+    stored = cache.get_many(keys.values())
+    versions = {}
+    for label, key in keys.items():
+        version = stored.get(key)
+        if version is None:
+            version = _new_version()
+            if not cache.add(key, version, None):
+                version = cache.get(key, version)
+        versions[label] = version
+    return versions
+
+
+def _set_model_version(label):
+    cache.set(VERSION_KEY.format(label=label), _new_version(), None)
+
+
+def bump_model_version(model):
+    """
+    Меняет версию модели после коммита текущей транзакции. Если сменить её
+    раньше, параллельный запрос прочтёт ещё старые строки и закэширует их
+    под новой версией.
+    """
+    transaction.on_commit(partial(_set_model_version, model._meta.label_lower))
+
+
+def _digest(request, versions, *extra):
+    parts = [get_language(), request.get_full_path(), *map(str, extra)]
+    parts += [f'{label}={version}' for label, version in sorted(versions.items())]
+    return hashlib.md5(':'.join(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+class ModelVersionsMixin:
+    """Версии моделей из cache_models, один раз на запрос."""
+    cache_models = ()
+
+    def get_model_versions(self):
+        if not hasattr(self, '_model_versions'):
+            self._model_versions = get_model_versions(self.cache_models)
+        return self._model_versions
+
+
+class ConditionalGetMixin(ModelVersionsMixin):
+    """
+    Отдаёт ETag и Last-Modified, посчитанные по версиям моделей, и отвечает 304
+    на If-None-Match/If-Modified-Since, не выполняя запросов к базе.
+    Для авторизованных ETag учитывает пользователя и версии user_cache_models.
+    Версии меняются только после коммита (bump_model_version), поэтому ETag
+    не достаётся данным, прочитанным до коммита.
+    """
+    user_cache_models = ()
+
+    def get(self, request, *args, **kwargs):
+        versions = self.get_model_versions()
+        user_id = None
+        if request.user.is_authenticated:
+            user_id = request.user.pk
+            versions = {**versions, **get_model_versions(self.user_cache_models)}
+        etag = quote_etag(_digest(request, versions, user_id))
+        last_modified = max(versions.values()) // 10 ** 9 if versions else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin(ModelVersionsMixin):
+    """
+    Кэширует ответ GET для анонимных пользователей по пути, строке запроса и языку.
+    Ключ включает версии моделей из cache_models, поэтому любое их изменение
+    делает старые ответы недоступными. С cache_authenticated общий ответ
+    отдаётся и авторизованным - для view, выдача которых не зависит от
+    пользователя (персональные поля накладывает PersonalizedResponseMixin).
+    """
+    cache_timeout = CACHE_TIMEOUT
+    cache_authenticated = False
+
+    def get(self, request, *args, **kwargs):
+        if request.user.is_authenticated and not self.cache_authenticated:
+            return super().get(request, *args, **kwargs)
+
+        key = RESPONSE_KEY.format(digest=_digest(request, self.get_model_versions()))
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:  # noqa: PLR2004
+            cache.set(key, response.data, self.cache_timeout)
+        return response
@@ -0,0 +1,24 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from namito.pages.cache import VERSIONED_APPS, bump_model_version
+
+
+def _is_versioned(model):
+    return model._meta.app_label in VERSIONED_APPS
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, **kwargs):
+    if _is_versioned(sender):
+        bump_model_version(sender)
+
+
+@receiver(m2m_changed)
+def invalidate_cached_relations(sender, instance, action, model, **kwargs):
+    if not action.startswith('post_'):
+        return
+    for changed in {sender, type(instance), model}:
+        if _is_versioned(changed):
+            bump_model_version(changed)
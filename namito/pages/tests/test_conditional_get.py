@@ -0,0 +1,119 @@
+import pytest
+from django.db import connection
+from django.db import transaction
+from django.contrib.auth.models import update_last_login
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Favorite
+from namito.catalog.tests.factories import CategoryFactory
+from namito.catalog.tests.factories import ReviewFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.orders.models import Order
+from namito.orders.models import OrderedItem
+from namito.pages.models import Contacts
+from namito.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_matching_etag_returns_not_modified():
+    Contacts.objects.create()
+    client = APIClient()
+    response = client.get("/api/layout/")
+    etag = response["ETag"]
+
+    with CaptureQueriesContext(connection) as context:
+        response = client.get("/api/layout/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 304  # noqa: PLR2004
+    assert len(context) == 0
+    assert response["Last-Modified"]
+
+
+def test_etag_changes_with_models(django_capture_on_commit_callbacks):
+    client = APIClient()
+    category = CategoryFactory(name="Clothes")
+    etag = client.get("/api/categories/")["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        category.name = "Shoes"
+        category.save()
+    response = client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["ETag"] != etag
+
+
+def test_etag_changes_only_after_commit(django_capture_on_commit_callbacks):
+    client = APIClient()
+    category = CategoryFactory(name="Clothes")
+    etag = client.get("/api/categories/")["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True), transaction.atomic():
+        category.name = "Shoes"
+        category.save()
+        # Пока транзакция не закрыта, новый ETag не выдаётся.
+        assert client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag).status_code == 304  # noqa: PLR2004
+    response = client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response["ETag"] != etag
+    assert [category["name"] for category in response.data] == ["Shoes"]
+
+
+def test_product_etag_depends_on_user_data(user: User, django_capture_on_commit_callbacks):
+    product = VariantFactory().product
+    client = APIClient()
+    client.force_authenticate(user)
+    url = f"/api/products/{product.pk}/"
+    etag = client.get(url)["ETag"]
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304  # noqa: PLR2004
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Favorite.objects.create(user=user, product=product)
+
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200  # noqa: PLR2004
+    assert APIClient().get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200  # noqa: PLR2004
+
+
+def test_product_etag_changes_when_order_is_delivered(user: User, django_capture_on_commit_callbacks):
+    variant = VariantFactory()
+    order = Order.objects.create(user=user, total_amount=100, delivery_method="самовывоз")
+    OrderedItem.objects.create(order=order, product_variant=variant)
+    client = APIClient()
+    client.force_authenticate(user)
+    url = f"/api/products/{variant.product.pk}/"
+    response = client.get(url)
+    assert response.data["review_allowed"] is False
+
+    with django_capture_on_commit_callbacks(execute=True):
+        order.status = 1
+        order.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.data["review_allowed"] is True
+
+
+def test_product_etag_follows_review_authors_only(django_capture_on_commit_callbacks):
+    review = ReviewFactory(text="Good")
+    author = review.user
+    client = APIClient()
+    url = f"/api/products/{review.product.pk}/"
+    etag = client.get(url)["ETag"]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        update_last_login(None, author)
+        author.fcm_token = "token"
+        author.save(update_fields=["fcm_token"])
+    assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304  # noqa: PLR2004
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author.full_name = "Aida"
+        author.save()
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.data["reviews"][0]["user"]["full_name"] == "Aida"
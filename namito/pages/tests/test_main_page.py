@@ -0,0 +1,55 @@
+import pytest
+from rest_framework.test import APIClient
+
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import ProductFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.pages.models import MainPage
+from namito.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def main_page():
+    return MainPage.objects.create(pk=1, title="Namito")
+
+
+def create_top_product():
+    product = ProductFactory(is_top=True)
+    VariantFactory(product=product, stock=10)
+    ImageFactory(product=product)
+    return product
+
+
+def get_main_page(client):
+    response = client.get("/api/main-page/")
+    assert response.status_code == 200  # noqa: PLR2004
+    return response
+
+
+@pytest.mark.parametrize("authenticated", [False, True])
+def test_top_products_are_sampled_on_every_request(authenticated, user: User):
+    for _ in range(30):
+        create_top_product()
+    client = APIClient()
+    if authenticated:
+        client.force_authenticate(user)
+
+    responses = [get_main_page(client) for _ in range(10)]
+
+    assert all("ETag" not in response for response in responses)
+    samples = {tuple(product["id"] for product in response.data["top_products"]) for response in responses}
+    assert len(samples) > 1
+    assert all(len(sample) == 15 for sample in samples)  # noqa: PLR2004
+
+
+def test_top_products_are_not_stored_in_the_cache(django_capture_on_commit_callbacks):
+    create_top_product()
+    client = APIClient()
+    get_main_page(client)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        second = create_top_product()
+
+    assert second.pk in {product["id"] for product in get_main_page(client).data["top_products"]}
@@ -0,0 +1,102 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.catalog.models import Color
+from namito.catalog.models import ProductView
+from namito.catalog.tests.factories import BrandFactory
+from namito.catalog.tests.factories import ColorFactory
+from namito.catalog.tests.factories import ImageFactory
+from namito.catalog.tests.factories import VariantFactory
+from namito.pages.cache import get_model_versions
+from namito.pages.models import Contacts
+from namito.pages.models import Phone
+from namito.users.models import User
+from namito.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def get(client, url, **extra):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url, **extra)
+    assert response.status_code == 200  # noqa: PLR2004
+    return response, len(context)
+
+
+def test_anonymous_response_is_cached():
+    contacts = Contacts.objects.create()
+    Phone.objects.create(contacts=contacts, phone="+996 555 000 000")
+    client = APIClient()
+
+    get(client, "/api/layout/")
+    response, queries = get(client, "/api/layout/")
+
+    assert queries == 0
+    assert response.data["phones"] == [{"phone": "+996 555 000 000"}]
+
+
+def test_cache_is_invalidated_by_model_changes(django_capture_on_commit_callbacks):
+    ColorFactory(name="Red")
+    client = APIClient()
+    get(client, "/api/colors-sizes-brands/")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ColorFactory(name="Blue")
+        BrandFactory(name="Acme")
+    response, queries = get(client, "/api/colors-sizes-brands/")
+
+    assert queries > 0
+    assert {color["name"] for color in response.data["colors"]} == {"Red", "Blue"}
+    assert [brand["name"] for brand in response.data["brands"]] == ["Acme"]
+
+
+def test_cache_is_keyed_on_language():
+    Contacts.objects.create()
+    client = APIClient()
+    get(client, "/api/layout/", HTTP_ACCEPT_LANGUAGE="ru")
+
+    _, queries = get(client, "/api/layout/", HTTP_ACCEPT_LANGUAGE="en")
+
+    assert queries > 0
+
+
+def test_authenticated_requests_bypass_cache(user: User):
+    Contacts.objects.create()
+    client = APIClient()
+    client.force_authenticate(user)
+    get(client, "/api/layout/")
+
+    _, queries = get(client, "/api/layout/")
+
+    assert queries > 0
+
+
+def test_product_views_reset_only_popularity_lists(django_capture_on_commit_callbacks):
+    products = [VariantFactory().product for _ in range(2)]
+    for product in products:
+        ImageFactory(product=product)
+    client = APIClient()
+    get(client, "/api/products/")
+    get(client, "/api/products/?ordering=popularity")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        ProductView.objects.create(product=products[1], user=UserFactory())
+
+    _, by_name = get(client, "/api/products/")
+    _, by_popularity = get(client, "/api/products/?ordering=popularity")
+    assert by_name == 0
+    assert by_popularity > 0
+
+
+def test_model_version_changes_only_after_commit(django_capture_on_commit_callbacks):
+    before = get_model_versions([Color])
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        ColorFactory(name="Red")
+        assert get_model_versions([Color]) == before
+
+    for callback in callbacks:
+        callback()
+    assert get_model_versions([Color]) != before
@@ -13,6 +13,7 @@ class CustomUserSerializer(serializers.ModelSerializer):
 
 
 class VerifyCodeSerializer(serializers.Serializer):
+    phone_number = serializers.CharField(max_length=13)
     code = serializers.CharField(max_length=4)
     fcm_token = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
     receive_notifications = serializers.BooleanField(required=False, allow_null=True)
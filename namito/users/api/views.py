@@ -25,9 +25,9 @@ from .serializers import (
     UserAddressUpdateSerializer,
     NotificationSerializer
 )
+from namito.users.otp import check_code, issue_code
 from namito.users.utils import (
     send_sms,
-    generate_confirmation_code,
     # send_telegram_message
 )
 
@@ -47,17 +47,12 @@ class UserLoginView(generics.CreateAPIView):
         elif not phone_number[4:].isdigit():
             return Response({'error': 'Invalid characters in phone number. Only digits are allowed after the country code.'}, status=status.HTTP_400_BAD_REQUEST)
 
-        confirmation_code = generate_confirmation_code()
+        confirmation_code = issue_code(phone_number)
         send_sms(phone_number, confirmation_code)
 
         # chat_id = 1105812455
         # async_to_sync(send_telegram_message)(chat_id, confirmation_code)
 
-        User.objects.update_or_create(
-            phone_number=phone_number,
-            defaults={'code': confirmation_code}
-        )
-
         response_data = {
             'message': 'Confirmation code sent successfully.',
             'code': confirmation_code
@@ -71,23 +66,28 @@ class VerifyCodeView(generics.CreateAPIView):
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        phone_number = serializer.validated_data.get('phone_number')
         code = serializer.validated_data.get('code')
         fcm_token = serializer.validated_data.get('fcm_token')
         receive_notifications = serializer.validated_data.get('receive_notifications')
 
-        user = User.objects.filter(code=code).first()
-        if not user:
+        if not check_code(phone_number, code):
             return Response({'error': 'Invalid code.'}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Пользователь создаётся только после подтверждения номера.
+        user, _created = User.objects.get_or_create(phone_number=phone_number)
         user.is_verified = True
-        user.code = None
 
+        changed = []
         if fcm_token is not None:
             user.fcm_token = fcm_token
+            changed.append('fcm_token')
         if receive_notifications is not None:
             user.receive_notifications = receive_notifications
+            changed.append('receive_notifications')
 
-        user.save()
+        if changed:
+            user.save(update_fields=changed)
 
         refresh = RefreshToken.for_user(user)
         access_token = str(refresh.access_token)
@@ -226,11 +226,11 @@ class NotificationSettingsAPIView(generics.RetrieveUpdateAPIView):
 
         if fcm_token is not None:
             user.fcm_token = fcm_token
-            user.save()
+            user.save(update_fields=['fcm_token'])
 
         if receive_notifications is not None:
             user.receive_notifications = receive_notifications
-            user.save()
+            user.save(update_fields=['receive_notifications'])
 
         serializer = self.get_serializer(user)
         return Response(serializer.data)
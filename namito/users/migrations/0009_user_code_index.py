@@ -0,0 +1,17 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0008_alter_user_receive_notifications'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(condition=models.Q(('code__isnull', False)), fields=['code'], name='user_code'),
+        ),
+    ]
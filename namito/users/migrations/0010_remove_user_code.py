@@ -0,0 +1,21 @@
+# Generated by Django 4.2.11 on 2026-10-18 20:55
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_code_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='user',
+            name='user_code',
+        ),
+        migrations.RemoveField(
+            model_name='user',
+            name='code',
+        ),
+    ]
@@ -26,7 +26,6 @@ class User(AbstractBaseUser, PermissionsMixin):
     username = models.CharField(null=True, blank=True, verbose_name=_('Никнейм пользователя'))
     name = models.CharField(null=True, blank=True, verbose_name=_('Имя'))
     phone_number = models.CharField(max_length=13, unique=True, verbose_name=_('Номер телефона'))
-    code = models.CharField(max_length=4, blank=True, null=True, verbose_name=_('Код'))
     is_staff = models.BooleanField(default=False, verbose_name=_('Работник'))
     profile_picture = models.ImageField(upload_to='profile_pictures/', blank=True, null=True, max_length=255, verbose_name=_('Изображение профиля'))
     full_name = models.CharField(max_length=255, blank=True, verbose_name=_('Полное имя'))
@@ -0,0 +1,50 @@
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+from namito.users.utils import generate_confirmation_code
+
+CODE_KEY = 'users:otp:{phone_number}:code'
+ATTEMPTS_KEY = 'users:otp:{phone_number}:attempts'
+OTP_TIMEOUT = 5 * 60
+OTP_MAX_ATTEMPTS = 5
+
+
+def _keys(phone_number):
+    return CODE_KEY.format(phone_number=phone_number), ATTEMPTS_KEY.format(phone_number=phone_number)
+
+
+def issue_code(phone_number):
+    """
+    Новый код подтверждения для номера. Предыдущий код номера и счётчик
+    попыток сбрасываются, код живёт OTP_TIMEOUT секунд.
+    """
+    code = generate_confirmation_code()
+    code_key, attempts_key = _keys(phone_number)
+    cache.set_many({code_key: code, attempts_key: 0}, OTP_TIMEOUT)
+    return code
+
+
+def check_code(phone_number, code):
+    """
+    Проверяет код номера. Верный код одноразовый, после OTP_MAX_ATTEMPTS
+    неверных попыток код удаляется и нужно запросить новый.
+    """
+    code_key, attempts_key = _keys(phone_number)
+    expected = cache.get(code_key)
+    if expected is None:
+        return False
+    try:
+        attempts = cache.incr(attempts_key)
+    except ValueError:
+        # Счётчик истёк вместе с кодом.
+        return False
+    if attempts > OTP_MAX_ATTEMPTS:
+        cache.delete_many([code_key, attempts_key])
+        return False
+    if not constant_time_compare(expected, code):
+        return False
+    # delete() вернёт True только одному из параллельных запросов с верным кодом.
+    if not cache.delete(code_key):
+        return False
+    cache.delete(attempts_key)
+    return True
@@ -0,0 +1,135 @@
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from xml.etree import ElementTree as ET
+
+import requests
+from decouple import config
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+BATCH_WINDOW = 0.05
+
+
+class SmsGateway:
+    """
+    Клиент шлюза smspro.nikita.kg. Соединения переиспользуются через общую
+    сессию, временные ошибки повторяются с экспоненциальной задержкой.
+    """
+
+    def __init__(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    @staticmethod
+    def build_message(phones, text):
+        request_body = ET.Element("message")
+        ET.SubElement(request_body, "login").text = config('login_nikita')
+        ET.SubElement(request_body, "pwd").text = config('password_nikita')
+        ET.SubElement(request_body, "id").text = str(uuid.uuid4())
+        ET.SubElement(request_body, "sender").text = config('sender_nikita')
+        ET.SubElement(request_body, "text").text = text
+        phones_element = ET.SubElement(request_body, "phones")
+        for phone in phones:
+            ET.SubElement(phones_element, "phone").text = phone
+
+        if settings.PRODUCTION:
+            ET.SubElement(request_body, "test").text = "0"
+
+        return ET.tostring(request_body, encoding="UTF-8", method="xml")
+
+    def send(self, phones, text):
+        """
+        Отправляет один текст на несколько номеров. Повторы идут с тем же id
+        сообщения, чтобы шлюз не разослал его дважды.
+        """
+        body = self.build_message(phones, text)
+        for attempt in range(settings.SMS_RETRIES + 1):
+            try:
+                response = self.session.post(settings.SMS_GATEWAY_URL, data=body,
+                                             headers={'Content-Type': 'application/xml'},
+                                             timeout=settings.SMS_TIMEOUT)
+            except requests.RequestException as error:
+                logger.warning('SMS gateway request failed: %s', error)
+            else:
+                if response.status_code == 200:
+                    return True
+                if response.status_code < 500:
+                    logger.error('SMS gateway rejected message: %s %s', response.status_code, response.content)
+                    return False
+                logger.warning('SMS gateway error: %s', response.status_code)
+            if attempt < settings.SMS_RETRIES:
+                time.sleep(settings.SMS_RETRY_BACKOFF * 2 ** attempt)
+        logger.error('SMS to %s was not delivered', ', '.join(phones))
+        return False
+
+
+class SmsQueue:
+    """
+    Очередь SMS с фоновым потоком доставки. Сообщения, пришедшие в течение
+    BATCH_WINDOW секунд, собираются вместе, и одинаковые тексты уходят одним
+    запросом на несколько номеров.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = None
+        self._pid = None
+
+    def put(self, phone_number, text):
+        self._ensure_worker()
+        self._queue.put((phone_number, text))
+
+    def join(self):
+        """Ждёт доставки всех поставленных сообщений."""
+        self._queue.join()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Потоки не переживают fork, поэтому в новом воркере gunicorn
+                # очередь и поток доставки создаются заново.
+                self._pid = os.getpid()
+                self._queue = queue.Queue()
+                self._worker = None
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, args=(self._queue,), name='sms-queue', daemon=True)
+                self._worker.start()
+
+    def _run(self, messages):
+        gateway = SmsGateway()
+        while True:
+            batch = [messages.get()]
+            deadline = time.monotonic() + BATCH_WINDOW
+            while len(batch) < settings.SMS_BATCH_SIZE:
+                try:
+                    batch.append(messages.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            self._deliver(gateway, batch)
+            for _message in batch:
+                messages.task_done()
+
+    @staticmethod
+    def _deliver(gateway, batch):
+        phones_by_text = defaultdict(list)
+        for phone_number, text in batch:
+            if phone_number not in phones_by_text[text]:
+                phones_by_text[text].append(phone_number)
+        for text, phones in phones_by_text.items():
+            try:
+                gateway.send(phones, text)
+            except Exception:
+                logger.exception('SMS delivery failed')
+
+
+sms_queue = SmsQueue()
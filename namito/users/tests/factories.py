@@ -3,6 +3,7 @@ from typing import Any
 
 from factory import Faker
 from factory import post_generation
+from factory import sequence
 from factory.django import DjangoModelFactory
 
 from namito.users.models import User
@@ -10,6 +11,11 @@ from namito.users.models import User
 
 class UserFactory(DjangoModelFactory):
     username = Faker("user_name")
+
+    @sequence
+    def phone_number(n):
+        return f"+996{n:09d}"
+
     email = Faker("email")
     name = Faker("name")
 
@@ -0,0 +1,72 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from namito.users import otp
+from namito.users.models import User
+
+PHONE = "+996555000111"
+
+
+@pytest.fixture()
+def sent(monkeypatch):
+    messages = []
+    monkeypatch.setattr("namito.users.api.views.send_sms", lambda phone, code: messages.append((phone, code)))
+    return messages
+
+
+def test_code_is_bound_to_phone_number():
+    code = otp.issue_code(PHONE)
+
+    assert not otp.check_code("+996555000222", code)
+    assert otp.check_code(PHONE, code)
+
+
+def test_code_is_single_use():
+    code = otp.issue_code(PHONE)
+
+    assert otp.check_code(PHONE, code)
+    assert not otp.check_code(PHONE, code)
+
+
+def test_code_is_dropped_after_too_many_attempts():
+    code = otp.issue_code(PHONE)
+    wrong = f"{(int(code) + 1) % 10000:04d}"
+    for _ in range(otp.OTP_MAX_ATTEMPTS):
+        assert not otp.check_code(PHONE, wrong)
+
+    assert not otp.check_code(PHONE, code)
+
+
+def test_new_code_replaces_previous():
+    first = otp.issue_code(PHONE)
+    second = otp.issue_code(PHONE)
+
+    assert first == second or not otp.check_code(PHONE, first)
+    assert otp.check_code(PHONE, second)
+
+
+@pytest.mark.django_db()
+def test_login_does_not_touch_users_table(sent):
+    with CaptureQueriesContext(connection) as queries:
+        response = APIClient().post("/api/users/login/", {"phone_number": PHONE})
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert sent == [(PHONE, response.data["code"])]
+    assert len(queries) == 0
+
+
+@pytest.mark.django_db()
+def test_verify_creates_user_and_returns_tokens(sent):
+    client = APIClient()
+    client.post("/api/users/login/", {"phone_number": PHONE})
+    [(_, code)] = sent
+
+    wrong = client.post("/api/users/verify-code/", {"phone_number": "+996555000222", "code": code})
+    response = client.post("/api/users/verify-code/", {"phone_number": PHONE, "code": code})
+
+    assert wrong.status_code == 400  # noqa: PLR2004
+    assert response.status_code == 200  # noqa: PLR2004
+    assert response.data["access_token"]
+    assert User.objects.filter(phone_number=PHONE).exists()
@@ -0,0 +1,116 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+from xml.etree import ElementTree as ET
+
+import pytest
+from rest_framework.test import APIClient
+
+from namito.users.sms import SmsGateway
+from namito.users.sms import sms_queue
+
+
+class FakeGateway(ThreadingHTTPServer):
+    """Локальный шлюз SMS: запоминает сообщения и отвечает ошибками, сколько попросят."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeGatewayHandler)
+        self.messages = []
+        self.failures = 0
+        self.delay = 0
+        self.connections = set()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/api/message"
+
+
+class FakeGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        gateway = self.server
+        gateway.connections.add(self.client_address)
+        message = ET.fromstring(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(gateway.delay)
+        if gateway.failures:
+            gateway.failures -= 1
+            status = 503
+        else:
+            gateway.messages.append({
+                "id": message.findtext("id"),
+                "text": message.findtext("text"),
+                "phones": [phone.text for phone in message.iter("phone")],
+            })
+            status = 200
+        self.send_response(status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture()
+def gateway(settings, monkeypatch):
+    server = FakeGateway()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.SMS_GATEWAY_URL = server.url
+    settings.SMS_RETRY_BACKOFF = 0
+    for name in ("login_nikita", "password_nikita", "sender_nikita"):
+        monkeypatch.setenv(name, "test")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_gateway_retries_server_errors(gateway):
+    gateway.failures = 2
+
+    assert SmsGateway().send(["+996555000111"], "Код 1234")
+    assert gateway.messages == [{"id": gateway.messages[0]["id"], "text": "Код 1234", "phones": ["+996555000111"]}]
+
+
+def test_gateway_gives_up_after_retries(gateway, settings):
+    gateway.failures = settings.SMS_RETRIES + 1
+
+    assert not SmsGateway().send(["+996555000111"], "Код 1234")
+    assert gateway.messages == []
+
+
+def test_gateway_reuses_connection(gateway):
+    client = SmsGateway()
+    for _ in range(3):
+        client.send(["+996555000111"], "Код 1234")
+
+    assert len(gateway.connections) == 1
+
+
+def test_queue_batches_same_text(gateway):
+    for phone in ("+996555000111", "+996555000222", "+996555000111"):
+        sms_queue.put(phone, "Скидки до 50%")
+    sms_queue.put("+996555000333", "Код 1234")
+    sms_queue.join()
+
+    assert sorted((message["text"], message["phones"]) for message in gateway.messages) == [
+        ("Код 1234", ["+996555000333"]),
+        ("Скидки до 50%", ["+996555000111", "+996555000222"]),
+    ]
+
+
+@pytest.mark.django_db()
+def test_login_does_not_wait_for_gateway(gateway):
+    gateway.delay = 1
+
+    started = time.monotonic()
+    response = APIClient().post("/api/users/login/", {"phone_number": "+996555000111"})
+    elapsed = time.monotonic() - started
+    sms_queue.join()
+
+    assert response.status_code == 200  # noqa: PLR2004
+    assert elapsed < gateway.delay
+    [message] = gateway.messages
+    assert message["phones"] == ["+996555000111"]
+    assert response.data["code"] in message["text"]